@@ -1,9 +1,44 @@
 """Init file for centralizing the core utils importation"""
 
 from .logging_util import logger
-from .firestore_util import save_to_firestore, update_firestore_status, init_db as init_fs_db
+from .cache_util import TTLCache
+from .write_behind import WriteBehindBuffer
+from .metrics_util import track_job, stage, current_metrics
+from .firestore_util import (
+    save_to_firestore,
+    save_many_to_firestore,
+    get_job_docs,
+    job_doc_id,
+    migrate_doc_ids,
+    update_firestore_status,
+    update_firestore_statuses,
+    dead_letter_collection,
+    requeue_dead_letters,
+    get_due_retry_jobs,
+    release_parked_jobs,
+    count_jobs,
+    claim_jobs,
+    reap_expired_leases,
+    init_db as init_fs_db,
+)
 from .gps_splitter_util import split_gps
-from .postgresql_util import init_db as init_pg_db, SessionLocal
+from .source_util import get_collection, extract_job_name
+from .hash_util import payload_hash
+from .retry_util import next_retry_at
+from .postgresql_util import (
+    init_db as init_pg_db,
+    SessionLocal,
+    session_scope,
+    PG_POOL_CAPACITY,
+)
+from .job_queue import (
+    JobQueue,
+    FirestoreJobQueue,
+    PostgresJobQueue,
+    QueuedJob,
+    JobBusyError,
+    get_job_queue,
+)
 from .mapping import *
 
 print("Imported all core utils successfully!")
\ No newline at end of file
@@ -1,31 +1,190 @@
+import os
+import hashlib
+from threading import Lock
+from datetime import datetime, timedelta, timezone
 from google.cloud import firestore
+from google.cloud.firestore import FieldFilter
 from google.api_core import exceptions as api_exceptions
+from google.rpc import code_pb2
 from core import logger
+from core.retry_util import next_retry_at
+
+# How long a worker may hold a claimed job before the reaper hands it back
+JOB_LEASE_SECONDS = int(os.getenv("JOB_LEASE_SECONDS", "900"))
+# Firestore caps a single batched write at 500 operations
+BATCH_WRITE_LIMIT = 500
+# Firestore caps the values of an "in" filter at 30
+IN_FILTER_LIMIT = 30
+# Attempts per document before a bulk write is reported as failed
+BULK_WRITE_MAX_ATTEMPTS = 5
+
+_client = None
+_client_lock = Lock()
 
 
 def init_db():
-    return firestore.Client()
+    """Return the process-wide Firestore client, creating it on first use.
+
+    The client holds the gRPC channel and is thread-safe, so every caller
+    shares one instead of paying for a new connection per write.
+    """
+    global _client
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                _client = firestore.Client()
+    return _client
+
+
+def job_doc_id(collection, job_id):
+    """Deterministic doc ID of a job, derived from its source and form ID"""
+    return hashlib.sha256(f"{collection}:{job_id}".encode()).hexdigest()
+
+
+def _new_job_doc(payload, job_name, status):
+    return {
+        "payload": payload,
+        "job_name": job_name,
+        "job_id": payload.get("id"),
+        "status": status,
+        "run_retries": 0,
+        "last_retried_at": "",
+        "created_at": firestore.SERVER_TIMESTAMP,
+        "updated_at": firestore.SERVER_TIMESTAMP,
+    }
+
+
+def _reset_job_doc(payload, job_name, status):
+    """Fields overwritten when a payload is delivered again"""
+    return {
+        "payload": payload,
+        "job_name": job_name,
+        "job_id": payload.get("id"),
+        "status": status,
+        "run_retries": 0,
+        "updated_at": firestore.SERVER_TIMESTAMP,
+    }
 
 
 def save_to_firestore(payload, job_name, status, collection, db=None):
-    """Func to save file to firestore"""
+    """Func to save file to firestore.
+
+    Payloads with an `id` are stored under job_doc_id(), so a re-delivered
+    form resets its existing doc instead of creating a second one. The doc
+    is created when missing and otherwise merged, which keeps created_at
+    and makes repeated deliveries safe without a lookup query.
+    """
+    if db is None:
+        db = init_db()
+
+    job_id = payload.get("id")
+    if not job_id:
+        doc_ref = db.collection(collection).add(_new_job_doc(payload, job_name, status))
+        return doc_ref[1].id
+
+    doc_ref = db.collection(collection).document(job_doc_id(collection, job_id))
+    try:
+        doc_ref.create(_new_job_doc(payload, job_name, status))
+    except api_exceptions.Conflict:
+        fields = _reset_job_doc(payload, job_name, status)
+        # Listing the fields replaces the payload map instead of deep-merging it
+        doc_ref.set(fields, merge=list(fields))
+
+    return doc_ref.id
+
+
+def save_many_to_firestore(items, collection, db=None):
+    """Store many (payload, job_name) pairs as 'new' jobs with a BulkWriter.
+
+    Every payload must have an `id`. Docs are created under job_doc_id();
+    those that already exist are then reset to 'new' in a second pass, like
+    a single re-delivered payload. Returns a
+    {job_id: {"doc_id", "status", "error"}} dict where status is "stored"
+    or "failed".
+    """
     if db is None:
         db = init_db()
-    
-    doc_ref = db.collection(collection).add(
+
+    col = db.collection(collection)
+    results = {}
+    doc_paths = {}
+    for payload, _ in items:
+        doc_ref = col.document(job_doc_id(collection, payload["id"]))
+        results[payload["id"]] = {"doc_id": doc_ref.id, "status": "stored", "error": None}
+        doc_paths[doc_ref.path] = payload["id"]
+
+    lock = Lock()
+    existing = set()
+
+    def on_error(failure, _):
+        with lock:
+            job_id = doc_paths[failure.operation.reference.path]
+            if failure.code == code_pb2.ALREADY_EXISTS:
+                existing.add(job_id)
+                return False
+            if failure.attempts < BULK_WRITE_MAX_ATTEMPTS:
+                return True
+            results[job_id].update({"status": "failed", "error": failure.message})
+            return False
+
+    writer = db.bulk_writer()
+    writer.on_write_error(on_error)
+    for payload, job_name in items:
+        writer.create(
+            col.document(results[payload["id"]]["doc_id"]),
+            _new_job_doc(payload, job_name, "new"),
+        )
+    writer.close()
+
+    if existing:
+        writer = db.bulk_writer()
+        writer.on_write_error(on_error)
+        for payload, job_name in items:
+            if payload["id"] in existing:
+                fields = _reset_job_doc(payload, job_name, "new")
+                writer.set(
+                    col.document(results[payload["id"]]["doc_id"]),
+                    fields,
+                    merge=list(fields),
+                )
+        writer.close()
+
+    logger.info(
         {
-            "payload": payload,
-            "job_name": job_name,
-            "job_id": payload.get("id"),
-            "status": status,
-            "run_retries": 0,
-            "last_retried_at": "",
-            "created_at": firestore.SERVER_TIMESTAMP,
-            "updated_at": firestore.SERVER_TIMESTAMP,
+            "message": "Bulk stored payloads",
+            "collection": collection,
+            "count": len(items),
+            "updated": len(existing),
+            "failed": sum(1 for r in results.values() if r["status"] == "failed"),
         }
     )
+    return results
 
-    return doc_ref[1].id
+
+def get_job_docs(collection, job_ids, db=None):
+    """Fetch the job docs of the given form IDs, in the order given.
+
+    Docs are read directly by job_doc_id(). IDs without such a doc fall back
+    to a job_id query, which finds docs stored before the deterministic IDs
+    (see migrate_doc_ids).
+    """
+    if db is None:
+        db = init_db()
+
+    col = db.collection(collection)
+    found = {}
+    refs = [col.document(job_doc_id(collection, job_id)) for job_id in job_ids]
+    for snapshot in db.get_all(refs):
+        if snapshot.exists:
+            found[snapshot.get("job_id")] = snapshot
+
+    legacy = [job_id for job_id in job_ids if job_id not in found]
+    for start in range(0, len(legacy), IN_FILTER_LIMIT):
+        chunk = legacy[start : start + IN_FILTER_LIMIT]
+        for snapshot in col.where(filter=FieldFilter("job_id", "in", chunk)).get():
+            found.setdefault(snapshot.get("job_id"), snapshot)
+
+    return [found[job_id] for job_id in dict.fromkeys(job_ids) if job_id in found]
 
 
 def update_firestore_status(doc_id, status, collection, fields=None, db=None):
@@ -72,3 +231,495 @@ def update_firestore_status(doc_id, status, collection, fields=None, db=None):
             }
         )
         raise
+
+
+def dead_letter_collection(collection):
+    """Collection that jobs out of retries are moved to"""
+    return f"{collection}_dead_letter"
+
+
+def _stage_status_update(batch, db, collection, update):
+    doc_ref = db.collection(collection).document(update["doc_id"])
+    update_data = {"status": update["status"]}
+    if update.get("fields"):
+        update_data.update(update["fields"])
+
+    if update.get("data") is not None:
+        # Dead letter: move the whole doc, keeping its ID
+        dead_ref = db.collection(dead_letter_collection(collection)).document(
+            update["doc_id"]
+        )
+        batch.set(
+            dead_ref,
+            {
+                **update["data"],
+                **update_data,
+                "dead_lettered_at": firestore.SERVER_TIMESTAMP,
+            },
+        )
+        batch.delete(doc_ref)
+    else:
+        batch.update(doc_ref, update_data)
+
+
+def update_firestore_statuses(updates, collection, db=None):
+    """Write many status transitions with batched writes.
+
+    `updates` is a list of {"doc_id", "status", "fields"} dicts. An update
+    that also carries the job's full "data" moves the doc to the dead-letter
+    collection instead of updating it in place. Updates are committed in
+    batches that stay within BATCH_WRITE_LIMIT; a batch that fails (e.g.
+    because one doc was deleted) falls back to per-doc writes so a single
+    bad doc does not block the rest. Returns the number of docs written.
+    """
+    if db is None:
+        db = init_db()
+
+    # A dead-letter move takes two operations
+    chunk_size = BATCH_WRITE_LIMIT // 2
+    written = 0
+    for start in range(0, len(updates), chunk_size):
+        chunk = updates[start : start + chunk_size]
+        batch = db.batch()
+        for update in chunk:
+            _stage_status_update(batch, db, collection, update)
+
+        try:
+            batch.commit()
+            written += len(chunk)
+        except (
+            api_exceptions.GoogleAPICallError,
+            api_exceptions.RetryError,
+        ) as e:
+            logger.warning(
+                {
+                    "message": "Batched status update failed, updating docs one by one",
+                    "count": len(chunk),
+                    "error": str(e),
+                }
+            )
+            for update in chunk:
+                try:
+                    batch = db.batch()
+                    _stage_status_update(batch, db, collection, update)
+                    batch.commit()
+                    written += 1
+                except Exception as e:
+                    # The lease reaper returns the job later
+                    logger.error(
+                        {
+                            "message": "Failed to update Firestore document",
+                            "doc_id": update["doc_id"],
+                            "status": update["status"],
+                            "error": str(e),
+                        }
+                    )
+
+    logger.info(
+        {
+            "message": "Successfully updated Firestore documents",
+            "collection": collection,
+            "count": written,
+        }
+    )
+    return written
+
+
+def requeue_dead_letters(collection, job_ids, db=None):
+    """Move dead-lettered jobs back to the queue as due 'failed' jobs with
+    a fresh retry budget. Returns the job IDs that were moved."""
+    if db is None:
+        db = init_db()
+
+    dead_col = db.collection(dead_letter_collection(collection))
+    refs = [dead_col.document(job_doc_id(collection, job_id)) for job_id in job_ids]
+    found = {}
+    for snapshot in db.get_all(refs):
+        if snapshot.exists:
+            found[snapshot.get("job_id")] = snapshot
+
+    # Jobs dead-lettered before the deterministic IDs keep their random ID
+    legacy = [job_id for job_id in job_ids if job_id not in found]
+    for start in range(0, len(legacy), IN_FILTER_LIMIT):
+        chunk = legacy[start : start + IN_FILTER_LIMIT]
+        for snapshot in dead_col.where(filter=FieldFilter("job_id", "in", chunk)).get():
+            found.setdefault(snapshot.get("job_id"), snapshot)
+    snapshots = list(found.values())
+
+    for start in range(0, len(snapshots), BATCH_WRITE_LIMIT // 2):
+        batch = db.batch()
+        for snapshot in snapshots[start : start + BATCH_WRITE_LIMIT // 2]:
+            data = snapshot.to_dict()
+            data.pop("dead_lettered_at", None)
+            data.update(
+                {
+                    "status": "failed",
+                    "run_retries": 0,
+                    "next_retry_at": datetime.now(timezone.utc),
+                    "updated_at": firestore.SERVER_TIMESTAMP,
+                }
+            )
+            doc_id = job_doc_id(collection, data["job_id"]) if data.get("job_id") else snapshot.id
+            batch.set(db.collection(collection).document(doc_id), data)
+            batch.delete(snapshot.reference)
+        batch.commit()
+
+    requeued = [s.get("job_id") for s in snapshots]
+    logger.info(
+        {"message": "Requeued dead-lettered jobs", "collection": collection, "count": len(requeued)}
+    )
+    return requeued
+
+
+def get_due_retry_jobs(collection, limit=10, db=None):
+    """Failed (or parked) jobs whose next_retry_at has passed, most overdue
+    first. For parked jobs this is the fallback in case the references they
+    wait on are never announced by another job.
+
+    Only the fields needed to claim the jobs are read; claim_jobs returns
+    the full docs. Jobs that failed before retries were scheduled get their
+    next_retry_at from migrate_doc_ids.
+    """
+    if db is None:
+        db = init_db()
+
+    return list(
+        db.collection(collection)
+        .where(filter=FieldFilter("status", "in", ["failed", "parked"]))
+        .where(filter=FieldFilter("next_retry_at", "<=", datetime.now(timezone.utc)))
+        .order_by("next_retry_at")
+        .select(["status"])
+        .limit(limit)
+        .get()
+    )
+
+
+def release_parked_jobs(collection, refs, db=None):
+    """Release parked jobs waiting on any of the dependency keys in `refs`.
+
+    Matching keys are removed from each job's `waiting_on`; a job with
+    nothing left to wait on goes back to 'new', using up one retry. Parked jobs are found with
+    one array_contains_any query per IN_FILTER_LIMIT keys. Each doc is only
+    written if it has not changed since it was read, so a job claimed in the
+    meantime is left alone. Returns the number of jobs released.
+    """
+    if db is None:
+        db = init_db()
+
+    refs = sorted(set(refs))
+    col = db.collection(collection)
+    parked = {}
+    for start in range(0, len(refs), IN_FILTER_LIMIT):
+        chunk = refs[start : start + IN_FILTER_LIMIT]
+        docs = (
+            col.where(filter=FieldFilter("status", "==", "parked"))
+            .where(filter=FieldFilter("waiting_on", "array_contains_any", chunk))
+            .select(["waiting_on"])
+            .get()
+        )
+        for doc in docs:
+            parked.setdefault(doc.id, doc)
+
+    provided = set(refs)
+    released = 0
+    for doc in parked.values():
+        waiting_on = set((doc.to_dict() or {}).get("waiting_on") or [])
+        if waiting_on - provided:
+            update_data = {"waiting_on": firestore.ArrayRemove(sorted(waiting_on & provided))}
+        else:
+            # A release counts as a retry, so a job that keeps being parked
+            # and released is eventually dead-lettered
+            update_data = {
+                "status": "new",
+                "waiting_on": [],
+                "next_retry_at": None,
+                "run_retries": firestore.Increment(1),
+            }
+        update_data["updated_at"] = firestore.SERVER_TIMESTAMP
+
+        try:
+            doc.reference.update(
+                update_data, option=db.write_option(last_update_time=doc.update_time)
+            )
+        except (api_exceptions.FailedPrecondition, api_exceptions.NotFound):
+            continue
+        if "status" in update_data:
+            released += 1
+
+    if parked:
+        logger.info(
+            {
+                "message": "Released parked jobs",
+                "collection": collection,
+                "matched": len(parked),
+                "released": released,
+            }
+        )
+    return released
+
+
+def count_jobs(collection, status, job_name=None, db=None):
+    """Count jobs with a status (and job name) using an aggregation query.
+
+    The count is computed server-side, so no documents are downloaded.
+    """
+    if db is None:
+        db = init_db()
+
+    query = db.collection(collection).where(filter=FieldFilter("status", "==", status))
+    if job_name is not None:
+        query = query.where(filter=FieldFilter("job_name", "==", job_name))
+
+    result = query.count(alias="count").get()
+    return int(result[0][0].value)
+
+
+def _retry_backfill(data, max_retries):
+    """next_retry_at of a job that failed before retries were scheduled, so
+    get_due_retry_jobs picks it up"""
+    if (
+        data.get("status") == "failed"
+        and "next_retry_at" not in data
+        and (max_retries is None or data.get("run_retries", 0) < max_retries)
+    ):
+        return {"next_retry_at": datetime.now(timezone.utc)}
+    return {}
+
+
+@firestore.transactional
+def _migrate_job_doc(transaction, legacy_ref, target_ref, max_retries):
+    """Move one legacy doc to its deterministic ID.
+
+    When both exist (the form was re-delivered after the switch), the most
+    recently updated copy wins. Jobs being processed are left for a later
+    run.
+    """
+    legacy = legacy_ref.get(transaction=transaction)
+    if not legacy.exists:
+        return "skipped"
+    data = legacy.to_dict()
+    target = target_ref.get(transaction=transaction)
+    target_data = target.to_dict() if target.exists else None
+
+    if "processing" in (data.get("status"), (target_data or {}).get("status")):
+        return "skipped"
+
+    data.update(_retry_backfill(data, max_retries))
+    if target_data is None:
+        outcome = "migrated"
+        transaction.set(target_ref, data)
+    else:
+        outcome = "merged"
+        legacy_updated = data.get("updated_at")
+        target_updated = target_data.get("updated_at")
+        backfill = _retry_backfill(target_data, max_retries)
+        if legacy_updated and (not target_updated or legacy_updated > target_updated):
+            transaction.set(target_ref, data)
+        elif backfill:
+            transaction.update(target_ref, backfill)
+
+    transaction.delete(legacy_ref)
+    return outcome
+
+
+def _backfill_next_retry(db, doc, max_retries):
+    """Schedule the retry of a failed job stored under its deterministic ID,
+    unless the doc changed since it was read"""
+    fields = _retry_backfill(doc.to_dict() or {}, max_retries)
+    if not fields:
+        return False
+    try:
+        doc.reference.update(fields, option=db.write_option(last_update_time=doc.update_time))
+    except api_exceptions.FailedPrecondition:
+        # Claimed or re-delivered meanwhile; it gets a next_retry_at when it fails
+        return False
+    return True
+
+
+def migrate_doc_ids(collection, limit=500, start_after=None, max_retries=None, db=None):
+    """One-time migration of random-ID job docs to job_doc_id() IDs.
+
+    Scans up to `limit` docs in doc ID order, starting after the doc ID
+    `start_after`, and moves every doc whose ID is not its deterministic
+    one. Failed jobs with fewer than `max_retries` retries and no
+    next_retry_at (they failed before retries were scheduled) are made due
+    now. Returns counts and the `next_cursor` to continue from (None once
+    the collection has been scanned). Safe to run repeatedly.
+    """
+    if db is None:
+        db = init_db()
+
+    col = db.collection(collection)
+    query = (
+        col.order_by("__name__")
+        .select(["job_id", "status", "run_retries", "next_retry_at"])
+        .limit(limit)
+    )
+    if start_after:
+        query = query.start_after({"__name__": start_after})
+    docs = query.get()
+
+    summary = {"scanned": len(docs), "migrated": 0, "merged": 0, "skipped": 0, "backfilled": 0}
+    for doc in docs:
+        job_id = (doc.to_dict() or {}).get("job_id")
+        if not job_id or doc.id == job_doc_id(collection, job_id):
+            summary["backfilled"] += _backfill_next_retry(db, doc, max_retries)
+            continue
+        outcome = _migrate_job_doc(
+            db.transaction(),
+            doc.reference,
+            col.document(job_doc_id(collection, job_id)),
+            max_retries,
+        )
+        summary[outcome] += 1
+
+    summary["next_cursor"] = docs[-1].id if len(docs) == limit else None
+    logger.info({"message": "Migrated job doc IDs", "collection": collection, **summary})
+    return summary
+
+
+@firestore.transactional
+def _claim_job(transaction, doc_ref, expected_status, owner, lease_seconds):
+    """Move a single job to 'processing' if nobody else claimed it first"""
+    snapshot = doc_ref.get(transaction=transaction)
+    if not snapshot.exists or snapshot.get("status") != expected_status:
+        return None
+
+    transaction.update(
+        doc_ref,
+        {
+            "status": "processing",
+            "lease_owner": owner,
+            "lease_expires_at": datetime.now(timezone.utc)
+            + timedelta(seconds=lease_seconds),
+            "updated_at": firestore.SERVER_TIMESTAMP,
+        },
+    )
+    return snapshot
+
+
+def claim_jobs(snapshots, owner, lease_seconds=JOB_LEASE_SECONDS, db=None):
+    """Atomically claim candidate job docs for this worker.
+
+    Each candidate is re-read inside a transaction and only claimed when its
+    status is still the one it was queried with, so two instances polling the
+    same queue never process the same doc. Returns the claimed snapshots.
+    """
+    if db is None:
+        db = init_db()
+
+    claimed = []
+    for snapshot in snapshots:
+        if snapshot.get("status") == "processing":
+            # Already leased by a worker; the reaper returns it if that worker dies
+            continue
+        try:
+            result = _claim_job(
+                db.transaction(),
+                snapshot.reference,
+                snapshot.get("status"),
+                owner,
+                lease_seconds,
+            )
+        except ValueError as e:
+            # Transaction kept aborting: another worker is contending for it
+            logger.warning(
+                {"message": "Failed to claim job", "doc_id": snapshot.id, "error": str(e)}
+            )
+            continue
+
+        if result is not None:
+            claimed.append(result)
+
+    logger.info(
+        {
+            "message": "Claimed jobs",
+            "owner": owner,
+            "candidates": len(snapshots),
+            "claimed": len(claimed),
+        }
+    )
+    return claimed
+
+
+# Error recorded on a job whose lease expired before it finished
+LEASE_EXPIRED_ERROR = "Lease expired: the worker died or timed out"
+
+
+@firestore.transactional
+def _release_lease(transaction, db, collection, doc_ref, now, max_retries):
+    """Fail a job if its lease is still expired, counting it as an attempt.
+
+    Like a failed run, it is scheduled for a retry, or moved to the
+    dead-letter collection once it is out of retries. Returns the new
+    status, or None if the job was left alone.
+    """
+    snapshot = doc_ref.get(transaction=transaction)
+    if not snapshot.exists or snapshot.get("status") != "processing":
+        return None
+
+    data = snapshot.to_dict() or {}
+    lease_expires_at = data.get("lease_expires_at")
+    if lease_expires_at and lease_expires_at > now:
+        return None
+
+    retries = data.get("run_retries", 0) + 1
+    fields = {
+        "error": LEASE_EXPIRED_ERROR,
+        "run_retries": retries,
+        "lease_owner": None,
+        "lease_expires_at": None,
+        "updated_at": firestore.SERVER_TIMESTAMP,
+    }
+    if retries >= max_retries:
+        dead_ref = db.collection(dead_letter_collection(collection)).document(doc_ref.id)
+        transaction.set(
+            dead_ref,
+            {
+                **data,
+                **fields,
+                "status": "dead_letter",
+                "next_retry_at": None,
+                "dead_lettered_at": firestore.SERVER_TIMESTAMP,
+            },
+        )
+        transaction.delete(doc_ref)
+        return "dead_letter"
+
+    transaction.update(
+        doc_ref, {**fields, "status": "failed", "next_retry_at": next_retry_at(retries, now)}
+    )
+    return "failed"
+
+
+def reap_expired_leases(collection, max_retries, limit=100, db=None):
+    """Fail jobs whose worker died mid-processing, so a payload that keeps
+    killing its worker is eventually dead-lettered"""
+    if db is None:
+        db = init_db()
+
+    now = datetime.now(timezone.utc)
+    expired = (
+        db.collection(collection)
+        .where(filter=FieldFilter("status", "==", "processing"))
+        .where(filter=FieldFilter("lease_expires_at", "<", now))
+        .limit(limit)
+        .get()
+    )
+
+    outcomes = [
+        _release_lease(db.transaction(), db, collection, snapshot.reference, now, max_retries)
+        for snapshot in expired
+    ]
+    reaped = sum(1 for outcome in outcomes if outcome)
+
+    if reaped:
+        logger.warning(
+            {
+                "message": "Released expired job leases",
+                "collection": collection,
+                "count": reaped,
+                "dead_lettered": outcomes.count("dead_letter"),
+            }
+        )
+    return reaped
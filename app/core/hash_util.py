@@ -0,0 +1,47 @@
+import hashlib
+import json
+import os
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# Keys CommCare changes when it re-forwards or re-indexes a form whose
+# answers did not change
+VOLATILE_PAYLOAD_KEYS = frozenset(
+    {
+        "indexed_on",
+        "received_on",
+        "server_modified_on",
+        "edited_on",
+        "resource_uri",
+    }
+)
+
+# Bump to make every payload hash differ, e.g. when a transformation changes
+# and stored records must be rewritten on the next replay
+PAYLOAD_HASH_VERSION = os.getenv("PAYLOAD_HASH_VERSION", "1")
+
+
+def _strip_volatile(value):
+    if isinstance(value, dict):
+        return {
+            key: _strip_volatile(item)
+            for key, item in value.items()
+            if key not in VOLATILE_PAYLOAD_KEYS
+        }
+    if isinstance(value, list):
+        return [_strip_volatile(item) for item in value]
+    return value
+
+
+def payload_hash(payload: dict) -> str:
+    """Stable SHA-256 of a payload's content, ignoring key order and
+    volatile keys"""
+    canonical = json.dumps(
+        [PAYLOAD_HASH_VERSION, _strip_volatile(payload)],
+        sort_keys=True,
+        separators=(",", ":"),
+        ensure_ascii=False,
+        default=str,
+    )
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
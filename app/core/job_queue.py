@@ -0,0 +1,478 @@
+"""Queue backends holding incoming payloads and their processing status.
+
+main.py only talks to the queue through the JobQueue interface. The
+Firestore backend is the default; JOB_QUEUE_BACKEND=postgres keeps the
+queue in the same database the jobs write to, so the whole pipeline can
+run against a single Postgres.
+"""
+
+import os
+from collections import namedtuple
+from datetime import datetime, timedelta, timezone
+from google.cloud import firestore
+from google.cloud.firestore import FieldFilter
+from sqlalchemy import and_, func, or_
+from sqlalchemy.dialects.postgresql import insert
+from core import logger
+from core.firestore_util import (
+    JOB_LEASE_SECONDS,
+    LEASE_EXPIRED_ERROR,
+    save_to_firestore,
+    save_many_to_firestore,
+    get_job_docs,
+    job_doc_id,
+    claim_jobs,
+    reap_expired_leases,
+    get_due_retry_jobs,
+    update_firestore_statuses,
+    release_parked_jobs,
+    requeue_dead_letters,
+    count_jobs,
+    init_db as init_fs_db,
+)
+from core.postgresql_util import session_scope
+from core.retry_util import next_retry_at
+from models import Job
+from dotenv import load_dotenv
+
+load_dotenv()
+
+JOB_QUEUE_BACKEND = os.getenv("JOB_QUEUE_BACKEND", "firestore").lower()
+# Rows per multi-row INSERT when saving many payloads
+PG_SAVE_CHUNK_SIZE = 1000
+
+# A queued job: its queue-specific ID and its fields (payload, job_name,
+# job_id, status, run_retries, ...)
+QueuedJob = namedtuple("QueuedJob", ["id", "data"])
+
+
+class JobBusyError(RuntimeError):
+    """Raised when a payload is delivered again while its job is being
+    processed; the sender should deliver it again later."""
+
+    def __init__(self, job_id: str):
+        self.job_id = job_id
+        super().__init__(f"Job '{job_id}' is being processed, deliver it again later")
+
+
+class JobQueue:
+    """Interface of a job queue backend.
+
+    Status updates are {"doc_id", "status", "fields"} dicts, plus the job's
+    "data" when it is moved to the dead letters.
+    """
+
+    name = None
+
+    def expected_doc_id(self, collection, job_id):
+        """ID a payload will be stored under, if known before it is written"""
+        return None
+
+    def save(self, collection, payload, job_name):
+        """Store a payload as a 'new' job, resetting an existing job with the
+        same form ID. Returns the job's ID."""
+        raise NotImplementedError
+
+    def save_many(self, collection, items):
+        """Store (payload, job_name) pairs with distinct form IDs. Returns
+        {job_id: {"doc_id", "status", "error"}}."""
+        raise NotImplementedError
+
+    def get_jobs(self, collection, job_ids):
+        raise NotImplementedError
+
+    def claim_by_ids(self, collection, job_ids, owner):
+        raise NotImplementedError
+
+    def claim_new(self, collection, limit, owner):
+        raise NotImplementedError
+
+    def claim_due(self, collection, limit, owner, max_retries):
+        """Claim failed or parked jobs whose next_retry_at has passed"""
+        raise NotImplementedError
+
+    def reap_expired(self, collection, max_retries):
+        """Fail jobs whose lease expired, counting it as an attempt and
+        dead-lettering jobs that are out of retries"""
+        raise NotImplementedError
+
+    def stage_status(self, collection, status_update, db):
+        """Apply a status update inside the job's own DB transaction.
+
+        Returns True if the backend did so; otherwise the update is written
+        later by write_statuses.
+        """
+        return False
+
+    def write_statuses(self, collection, status_updates):
+        raise NotImplementedError
+
+    def release_parked(self, collection, refs):
+        """Send parked jobs whose references are all in `refs` back to
+        'new'. A release uses up one of the job's retries."""
+        raise NotImplementedError
+
+    def requeue_dead_letters(self, collection, job_ids):
+        raise NotImplementedError
+
+    def count(self, collection, status, job_name=None):
+        raise NotImplementedError
+
+
+class FirestoreJobQueue(JobQueue):
+    """Jobs stored as docs of a Firestore collection per source"""
+
+    name = "firestore"
+
+    @staticmethod
+    def _queued(snapshots):
+        return [QueuedJob(s.id, s.to_dict()) for s in snapshots]
+
+    def expected_doc_id(self, collection, job_id):
+        return job_doc_id(collection, job_id)
+
+    def save(self, collection, payload, job_name):
+        return save_to_firestore(payload, job_name, "new", collection)
+
+    def save_many(self, collection, items):
+        return save_many_to_firestore(items, collection)
+
+    def get_jobs(self, collection, job_ids):
+        return self._queued(get_job_docs(collection, job_ids))
+
+    def claim_by_ids(self, collection, job_ids, owner):
+        return self._queued(claim_jobs(get_job_docs(collection, job_ids), owner))
+
+    def claim_new(self, collection, limit, owner):
+        candidates = (
+            init_fs_db()
+            .collection(collection)
+            .where(filter=FieldFilter("status", "==", "new"))
+            .limit(limit)
+            .get()
+        )
+        return self._queued(claim_jobs(candidates, owner))
+
+    def claim_due(self, collection, limit, owner, max_retries):
+        return self._queued(
+            claim_jobs(get_due_retry_jobs(collection, limit=limit), owner)
+        )
+
+    def reap_expired(self, collection, max_retries):
+        return reap_expired_leases(collection, max_retries)
+
+    def write_statuses(self, collection, status_updates):
+        return update_firestore_statuses(status_updates, collection)
+
+    def release_parked(self, collection, refs):
+        return release_parked_jobs(collection, refs)
+
+    def requeue_dead_letters(self, collection, job_ids):
+        return requeue_dead_letters(collection, job_ids)
+
+    def count(self, collection, status, job_name=None):
+        return count_jobs(collection, status, job_name)
+
+
+class PostgresJobQueue(JobQueue):
+    """Jobs stored as rows of the `jobs` table, one `queue` per source.
+
+    Claims lock rows with FOR UPDATE SKIP LOCKED, so concurrent workers
+    never wait on or double-claim the same job, and a job's status change
+    commits in the same transaction as the records it wrote.
+    """
+
+    name = "postgres"
+
+    @staticmethod
+    def _queued(job):
+        return QueuedJob(
+            str(job.id),
+            {
+                "payload": job.payload,
+                "job_name": job.job_name,
+                "job_id": job.job_id,
+                "status": job.status,
+                "run_retries": job.run_retries,
+                "last_retried_at": job.last_retried_at,
+                "next_retry_at": job.next_retry_at,
+                "waiting_on": list(job.waiting_on or []),
+                "error": job.error,
+                "record_id": job.record_id,
+                "metrics": job.metrics,
+                "created_at": job.created_at,
+                "updated_at": job.updated_at,
+            },
+        )
+
+    @staticmethod
+    def _values(status_update):
+        """Column values of a status update, with Firestore server timestamps
+        replaced by now()"""
+        values = {"status": status_update["status"]}
+        for key, value in (status_update.get("fields") or {}).items():
+            if key in Job.__table__.columns:
+                values[key] = func.now() if value is firestore.SERVER_TIMESTAMP else value
+        values["updated_at"] = func.now()
+        if status_update["status"] == "dead_letter":
+            values["dead_lettered_at"] = func.now()
+        return values
+
+    def _upsert(self, rows):
+        """Insert jobs, resetting existing ones to a fresh 'new' job.
+
+        Jobs a worker is processing are left alone and not returned: the
+        worker would overwrite the reset with its own outcome.
+        """
+        stmt = insert(Job).values(rows)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[Job.queue, Job.job_id],
+            set_={
+                "payload": stmt.excluded.payload,
+                "job_name": stmt.excluded.job_name,
+                "status": "new",
+                "run_retries": 0,
+                "waiting_on": [],
+                "next_retry_at": None,
+                "error": None,
+                "lease_owner": None,
+                "lease_expires_at": None,
+                "dead_lettered_at": None,
+                "updated_at": func.now(),
+            },
+            where=Job.status != "processing",
+        )
+        return stmt.returning(Job.job_id, Job.id)
+
+    @staticmethod
+    def _row(collection, payload, job_name):
+        return {
+            "queue": collection,
+            "job_id": payload.get("id"),
+            "job_name": job_name,
+            "payload": payload,
+            "status": "new",
+            "run_retries": 0,
+        }
+
+    def save(self, collection, payload, job_name):
+        with session_scope() as db:
+            row = db.execute(
+                self._upsert([self._row(collection, payload, job_name)])
+            ).one_or_none()
+            if row is None:
+                raise JobBusyError(payload.get("id"))
+            return str(row.id)
+
+    def save_many(self, collection, items):
+        results = {}
+        with session_scope() as db:
+            for start in range(0, len(items), PG_SAVE_CHUNK_SIZE):
+                rows = [
+                    self._row(collection, payload, job_name)
+                    for payload, job_name in items[start : start + PG_SAVE_CHUNK_SIZE]
+                ]
+                for row in db.execute(self._upsert(rows)):
+                    results[row.job_id] = {
+                        "doc_id": str(row.id),
+                        "status": "stored",
+                        "error": None,
+                    }
+                for row in rows:
+                    if row["job_id"] not in results:
+                        results[row["job_id"]] = {
+                            "doc_id": None,
+                            "status": "failed",
+                            "error": str(JobBusyError(row["job_id"])),
+                        }
+        return results
+
+    def get_jobs(self, collection, job_ids):
+        with session_scope() as db:
+            jobs = {
+                job.job_id: self._queued(job)
+                for job in db.query(Job).filter(
+                    Job.queue == collection, Job.job_id.in_(job_ids)
+                )
+            }
+        return [jobs[job_id] for job_id in dict.fromkeys(job_ids) if job_id in jobs]
+
+    def _claim(self, collection, owner, limit, criteria, order_by):
+        lease_expires_at = datetime.now(timezone.utc) + timedelta(seconds=JOB_LEASE_SECONDS)
+        with session_scope() as db:
+            query = db.query(Job).filter(Job.queue == collection, *criteria)
+            query = query.order_by(*order_by)
+            if limit:
+                query = query.limit(limit)
+            jobs = query.with_for_update(skip_locked=True).all()
+
+            claimed = []
+            for job in jobs:
+                claimed.append(self._queued(job))
+                job.status = "processing"
+                job.lease_owner = owner
+                job.lease_expires_at = lease_expires_at
+
+        logger.info(
+            {"message": "Claimed jobs", "owner": owner, "claimed": len(claimed)}
+        )
+        return claimed
+
+    def claim_by_ids(self, collection, job_ids, owner):
+        return self._claim(
+            collection,
+            owner,
+            None,
+            [
+                Job.job_id.in_(job_ids),
+                Job.status.notin_(["processing", "dead_letter"]),
+            ],
+            [Job.created_at],
+        )
+
+    def claim_new(self, collection, limit, owner):
+        return self._claim(
+            collection, owner, limit, [Job.status == "new"], [Job.created_at]
+        )
+
+    def claim_due(self, collection, limit, owner, max_retries):
+        return self._claim(
+            collection,
+            owner,
+            limit,
+            [
+                or_(
+                    and_(
+                        Job.status.in_(["failed", "parked"]),
+                        Job.next_retry_at <= func.now(),
+                    ),
+                    # Failed before retries were scheduled
+                    and_(
+                        Job.status == "failed",
+                        Job.next_retry_at.is_(None),
+                        Job.run_retries < max_retries,
+                    ),
+                )
+            ],
+            [Job.next_retry_at.asc().nulls_last()],
+        )
+
+    def reap_expired(self, collection, max_retries):
+        dead_lettered = 0
+        with session_scope() as db:
+            jobs = (
+                db.query(Job)
+                .filter(
+                    Job.queue == collection,
+                    Job.status == "processing",
+                    Job.lease_expires_at < func.now(),
+                )
+                .with_for_update(skip_locked=True)
+                .all()
+            )
+            for job in jobs:
+                # Counts as an attempt, like a failed run
+                job.run_retries = (job.run_retries or 0) + 1
+                job.error = LEASE_EXPIRED_ERROR
+                job.lease_owner = None
+                job.lease_expires_at = None
+                if job.run_retries >= max_retries:
+                    job.status = "dead_letter"
+                    job.next_retry_at = None
+                    job.dead_lettered_at = func.now()
+                    dead_lettered += 1
+                else:
+                    job.status = "failed"
+                    job.next_retry_at = next_retry_at(job.run_retries)
+
+        if jobs:
+            logger.warning(
+                {
+                    "message": "Released expired job leases",
+                    "collection": collection,
+                    "count": len(jobs),
+                    "dead_lettered": dead_lettered,
+                }
+            )
+        return len(jobs)
+
+    def stage_status(self, collection, status_update, db):
+        db.query(Job).filter(Job.id == status_update["doc_id"]).update(
+            self._values(status_update), synchronize_session=False
+        )
+        return True
+
+    def write_statuses(self, collection, status_updates):
+        with session_scope() as db:
+            for status_update in status_updates:
+                self.stage_status(collection, status_update, db)
+        return len(status_updates)
+
+    def release_parked(self, collection, refs):
+        provided = set(refs)
+        released = 0
+        with session_scope() as db:
+            jobs = (
+                db.query(Job)
+                .filter(
+                    Job.queue == collection,
+                    Job.status == "parked",
+                    Job.waiting_on.overlap(sorted(provided)),
+                )
+                .with_for_update(skip_locked=True)
+                .all()
+            )
+            for job in jobs:
+                job.waiting_on = [ref for ref in job.waiting_on if ref not in provided]
+                if not job.waiting_on:
+                    job.status = "new"
+                    job.next_retry_at = None
+                    job.run_retries = (job.run_retries or 0) + 1
+                    released += 1
+
+        if jobs:
+            logger.info(
+                {
+                    "message": "Released parked jobs",
+                    "collection": collection,
+                    "matched": len(jobs),
+                    "released": released,
+                }
+            )
+        return released
+
+    def requeue_dead_letters(self, collection, job_ids):
+        with session_scope() as db:
+            jobs = (
+                db.query(Job)
+                .filter(
+                    Job.queue == collection,
+                    Job.status == "dead_letter",
+                    Job.job_id.in_(job_ids),
+                )
+                .with_for_update()
+                .all()
+            )
+            for job in jobs:
+                job.status = "failed"
+                job.run_retries = 0
+                job.next_retry_at = func.now()
+                job.dead_lettered_at = None
+            return [job.job_id for job in jobs]
+
+    def count(self, collection, status, job_name=None):
+        with session_scope() as db:
+            query = db.query(func.count(Job.id)).filter(
+                Job.queue == collection, Job.status == status
+            )
+            if job_name is not None:
+                query = query.filter(Job.job_name == job_name)
+            return query.scalar()
+
+
+def get_job_queue(backend: str = JOB_QUEUE_BACKEND) -> JobQueue:
+    if backend == "postgres":
+        return PostgresJobQueue()
+    if backend == "firestore":
+        return FirestoreJobQueue()
+    raise ValueError(f"Invalid job queue backend: {backend}")
@@ -0,0 +1,138 @@
+"""Per-job timing and SQL counters.
+
+`track_job()` opens a JobMetrics for the current job in a context variable,
+so it follows the job's thread without being passed around. Work wrapped in
+`stage(name)` is timed exclusively: while a nested stage runs (e.g. a
+resolver lookup inside a transform) the outer stage's clock is paused, and
+the stage times add up to the job's duration. Statements executed on an
+instrumented engine and session commits are counted against the job that
+issued them.
+"""
+
+import time
+from contextlib import ContextDecorator, contextmanager
+from contextvars import ContextVar
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+_current: ContextVar = ContextVar("job_metrics", default=None)
+
+# Stage name used for session commits, including their final flush
+COMMIT_STAGE = "commit"
+_WRITE_VERBS = ("INSERT", "UPDATE", "DELETE")
+
+
+class JobMetrics:
+    """Timing and SQL counters of one job"""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.stage_ms = {}
+        self.sql_statements = 0
+        self.rows_written = 0
+        self._stack = []  # [stage name, time its clock last (re)started]
+
+    def enter(self, name: str):
+        now = time.perf_counter()
+        if self._stack:
+            self._stop_clock(now)
+        self._stack.append([name, now])
+
+    def exit(self, name: str):
+        if not self._stack or self._stack[-1][0] != name:
+            return
+        now = time.perf_counter()
+        self._stop_clock(now)
+        self._stack.pop()
+        if self._stack:
+            self._stack[-1][1] = now
+
+    def _stop_clock(self, now: float):
+        name, resumed_at = self._stack[-1]
+        self.stage_ms[name] = self.stage_ms.get(name, 0.0) + (now - resumed_at) * 1000
+
+    def summary(self) -> dict:
+        now = time.perf_counter()
+        while self._stack:
+            self.exit(self._stack[-1][0])
+
+        duration_ms = (now - self.started) * 1000
+        stage_ms = {name: round(ms, 1) for name, ms in self.stage_ms.items()}
+        stage_ms["other"] = round(max(duration_ms - sum(self.stage_ms.values()), 0.0), 1)
+        return {
+            "duration_ms": round(duration_ms, 1),
+            "stage_ms": stage_ms,
+            "sql_statements": self.sql_statements,
+            "rows_written": self.rows_written,
+        }
+
+
+def current_metrics():
+    """Metrics of the job running in this context, if any"""
+    return _current.get()
+
+
+@contextmanager
+def track_job():
+    """Collect metrics for the job run inside the block"""
+    metrics = JobMetrics()
+    token = _current.set(metrics)
+    try:
+        yield metrics
+    finally:
+        _current.reset(token)
+
+
+class stage(ContextDecorator):
+    """Time a block or function as stage `name` of the current job.
+
+    A no-op outside of `track_job()`.
+    """
+
+    def __init__(self, name: str):
+        self.name = name
+
+    def __enter__(self):
+        metrics = _current.get()
+        if metrics is not None:
+            metrics.enter(self.name)
+        return self
+
+    def __exit__(self, *exc):
+        metrics = _current.get()
+        if metrics is not None:
+            metrics.exit(self.name)
+        return False
+
+
+def instrument_engine(engine):
+    """Count the statements run on `engine` and the rows they wrote"""
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def _count_statement(conn, cursor, statement, parameters, context, executemany):
+        metrics = _current.get()
+        if metrics is None:
+            return
+        metrics.sql_statements += 1
+        if context.isinsert or context.isupdate or context.isdelete or (
+            # Textual statements carry no compiled DML flags
+            statement.lstrip()[:6].upper() in _WRITE_VERBS
+        ):
+            metrics.rows_written += max(cursor.rowcount or 0, 0)
+
+    return engine
+
+
+@event.listens_for(Session, "before_commit")
+def _start_commit(session):
+    metrics = _current.get()
+    if metrics is not None:
+        metrics.enter(COMMIT_STAGE)
+
+
+@event.listens_for(Session, "after_commit")
+@event.listens_for(Session, "after_rollback")
+def _end_commit(session):
+    metrics = _current.get()
+    if metrics is not None:
+        metrics.exit(COMMIT_STAGE)
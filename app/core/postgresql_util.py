@@ -1,7 +1,9 @@
 import os
+from contextlib import contextmanager
 from sqlalchemy import create_engine
 from sqlalchemy.orm import sessionmaker
 from dotenv import load_dotenv
+from core.metrics_util import instrument_engine
 
 # Load .env variables
 load_dotenv()
@@ -11,8 +13,21 @@ DATABASE_URL = os.getenv("PG_LOCAL_DATABASE_URL")  # Local DB for development
 if not DATABASE_URL:
     raise ValueError("PG_LOCAL_DATABASE_URL not set in environment")
 
+# Connection pool sizing. Concurrent job workers each hold one connection,
+# so the pool capacity is also the upper bound for job parallelism.
+PG_POOL_SIZE = int(os.getenv("PG_POOL_SIZE", "5"))
+PG_MAX_OVERFLOW = int(os.getenv("PG_MAX_OVERFLOW", "5"))
+PG_POOL_CAPACITY = PG_POOL_SIZE + PG_MAX_OVERFLOW
+
 # SQLAlchemy engine and session
-engine = create_engine(DATABASE_URL, echo=False)
+engine = create_engine(
+    DATABASE_URL,
+    echo=False,
+    pool_size=PG_POOL_SIZE,
+    max_overflow=PG_MAX_OVERFLOW,
+    pool_pre_ping=True,
+)
+instrument_engine(engine)
 SessionLocal = sessionmaker(bind=engine)
 
 # Import Base AFTER engine is defined
@@ -25,3 +40,21 @@ def init_db():
     # Base.metadata.drop_all(bind=engine)
     # Base.metadata.create_all(bind=engine)
     pass
+
+
+@contextmanager
+def session_scope():
+    """Provide a session scoped to one unit of work.
+
+    Commits when the block succeeds, rolls back when it raises and always
+    returns the connection to the pool.
+    """
+    db = SessionLocal()
+    try:
+        yield db
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        db.close()
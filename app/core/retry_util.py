@@ -0,0 +1,21 @@
+import os
+import random
+from datetime import datetime, timedelta, timezone
+
+# Delay before the first retry of a failed job; doubled after every further
+# failure up to RETRY_MAX_DELAY_S
+RETRY_BASE_DELAY_S = float(os.getenv("RETRY_BASE_DELAY_S", "300"))
+RETRY_MAX_DELAY_S = float(os.getenv("RETRY_MAX_DELAY_S", "21600"))
+
+
+def retry_delay_s(retries: int) -> float:
+    """Backoff before the next attempt of a job that has been retried
+    `retries` times. Jittered between half and the full exponential delay,
+    so jobs that failed together do not all come due together."""
+    delay = min(RETRY_MAX_DELAY_S, RETRY_BASE_DELAY_S * 2 ** max(retries, 0))
+    return delay / 2 + random.uniform(0, delay / 2)
+
+
+def next_retry_at(retries: int, now: datetime = None) -> datetime:
+    now = now or datetime.now(timezone.utc)
+    return now + timedelta(seconds=retry_delay_s(retries))
@@ -0,0 +1,24 @@
+"""Helpers mapping a payload source to its queue and job names"""
+
+
+def get_collection(source: str):
+    if source.lower() in ["commcare", "cc"]:
+        return "commcare_payloads"
+    elif source.lower() in ["postgres", "pg", "postgresql"]:
+        return "postgres_payloads"
+    else:
+        raise ValueError(f"Invalid source: {source}")
+
+
+def extract_job_name(source: str, payload: dict):
+    if source.lower() in ["commcare", "cc"]:
+        job_name = payload.get("form", {}).get("@name")
+        if (
+            job_name == "Followup"
+            and payload.get("form", {}).get("survey_type", "") == "Attendance Light"
+        ):
+            job_name = "Attendance Light - Current Module"
+        return job_name
+    elif source.lower() in ["postgres", "pg", "postgresql"]:
+        return payload.get("jobType")
+    return None
@@ -0,0 +1,167 @@
+import atexit
+import queue
+import signal
+import threading
+import time
+from core import logger
+
+
+class WriteBehindBuffer:
+    """Bounded in-process queue drained to storage by a background thread.
+
+    `offer()` never blocks: it returns False when the buffer is full so the
+    caller can push back. The flusher hands up to `batch_size` items at a
+    time to `flush_fn`, which returns the items it could not store (or
+    raises to retry the whole batch). Those are retried `max_attempts`
+    times, then put back in the buffer. Items that cannot go back, because
+    the buffer is full or shutting down, are handed to `spill_fn` instead
+    of being dropped. Once install_shutdown_hooks() has run, everything
+    still buffered is flushed on SIGTERM and at interpreter exit before the
+    process goes away.
+    """
+
+    def __init__(
+        self,
+        flush_fn,
+        maxsize: int = 1000,
+        batch_size: int = 200,
+        flush_interval_s: float = 0.5,
+        max_attempts: int = 3,
+        spill_fn=None,
+    ):
+        self.flush_fn = flush_fn
+        self.spill_fn = spill_fn
+        self.batch_size = batch_size
+        self.flush_interval_s = flush_interval_s
+        self.max_attempts = max_attempts
+        self._queue: queue.Queue = queue.Queue(maxsize=maxsize)
+        self._stop = threading.Event()
+        self._flush_lock = threading.Lock()
+        self._start_lock = threading.Lock()
+        self._thread = None
+        self._previous_sigterm = None
+
+    def offer(self, item) -> bool:
+        """Enqueue an item, returning False if the buffer is full"""
+        self._ensure_started()
+        try:
+            self._queue.put_nowait(item)
+            return True
+        except queue.Full:
+            return False
+
+    def qsize(self) -> int:
+        return self._queue.qsize()
+
+    def _ensure_started(self):
+        # Started on first use rather than at import, so forked workers each
+        # get their own flusher thread
+        if self._thread is not None and self._thread.is_alive():
+            return
+        with self._start_lock:
+            if self._thread is not None and self._thread.is_alive():
+                return
+            self._stop.clear()
+            self._thread = threading.Thread(
+                target=self._run, name="write-behind-flusher", daemon=True
+            )
+            self._thread.start()
+
+    def install_shutdown_hooks(self):
+        """Flush the buffer on SIGTERM and at interpreter exit.
+
+        Call from the main thread, e.g. where the buffer is created at
+        import: signal handlers cannot be installed from request threads,
+        and atexit alone does not run when SIGTERM kills the process.
+        """
+        if self._previous_sigterm is not None:
+            return
+        atexit.register(self.close)
+        try:
+            self._previous_sigterm = signal.signal(signal.SIGTERM, self._on_sigterm)
+        except ValueError:
+            # Not on the main thread; rely on atexit only
+            self._previous_sigterm = signal.SIG_DFL
+            logger.warning(
+                {"message": "Write-behind buffer could not install a SIGTERM handler"}
+            )
+
+    def _on_sigterm(self, signum, frame):
+        logger.info(
+            {"message": "SIGTERM received, flushing write-behind buffer", "pending": self.qsize()}
+        )
+        self.close()
+        previous = self._previous_sigterm
+        if callable(previous):
+            previous(signum, frame)
+        elif previous == signal.SIG_DFL:
+            signal.signal(signal.SIGTERM, signal.SIG_DFL)
+            signal.raise_signal(signal.SIGTERM)
+
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                first = self._queue.get(timeout=self.flush_interval_s)
+            except queue.Empty:
+                continue
+            self._flush([first] + self._take(self.batch_size - 1))
+
+    def _take(self, limit: int) -> list:
+        items = []
+        while len(items) < limit:
+            try:
+                items.append(self._queue.get_nowait())
+            except queue.Empty:
+                break
+        return items
+
+    def _flush(self, items: list):
+        with self._flush_lock:
+            for attempt in range(1, self.max_attempts + 1):
+                try:
+                    items = list(self.flush_fn(items) or [])
+                    if not items:
+                        return
+                    error = "items not stored"
+                except Exception as e:
+                    error = str(e)
+                logger.error(
+                    {
+                        "message": "Write-behind flush failed",
+                        "attempt": attempt,
+                        "count": len(items),
+                        "error": error,
+                    }
+                )
+                if attempt < self.max_attempts:
+                    time.sleep(min(2**attempt, 10))
+
+            self._requeue(items)
+
+    def _requeue(self, items: list):
+        """Put unstored items back in the buffer, spilling what cannot go back"""
+        if not self._stop.is_set():
+            for index, item in enumerate(items):
+                try:
+                    self._queue.put_nowait(item)
+                except queue.Full:
+                    items = items[index:]
+                    break
+            else:
+                return
+
+        logger.error({"message": "Spilling unstored write-behind items", "count": len(items)})
+        if self.spill_fn is not None:
+            self.spill_fn(items)
+
+    def close(self, timeout: float = 10.0):
+        """Stop the flusher and synchronously flush whatever is still buffered"""
+        self._stop.set()
+        if self._thread is not None and self._thread is not threading.current_thread():
+            self._thread.join(timeout=timeout)
+
+        while True:
+            items = self._take(self.batch_size)
+            if not items:
+                break
+            self._flush(items)
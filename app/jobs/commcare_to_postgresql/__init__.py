@@ -8,4 +8,20 @@ from .participant_registration_and_update import ParticipantRegistrationAndUpdat
 from .wetmill_registration import WetmillRegistrationOrchestrator
 from .wetmill_visit import WetmillVisitOrchestrator
 
+# Orchestrator handling each job name
+JOB_MAPPING = {
+    "Farmer Registration": ParticipantRegistrationAndUpdateOrchestrator,
+    "Attendance Full - Current Module": AttendanceFullOrchestrator,
+    "Edit Farmer Details": ParticipantRegistrationAndUpdateOrchestrator,
+    "Training Observation": ObservationOrchestrator,
+    "Attendance Light - Current Module": AttendanceLightOrchestrator,
+    "Demo Plot Observation": ObservationOrchestrator,
+    "Farm Visit Full": FarmVisitOrchestrator,
+    "Farm Visit - AA": FarmVisitOrchestrator,
+    "Field Day Farmer Registration": ParticipantRegistrationAndUpdateOrchestrator,
+    "Field Day Attendance Full": AttendanceFullOrchestrator,
+    "Wet Mill Registration Form": WetmillRegistrationOrchestrator,
+    "Wet Mill Visit": WetmillVisitOrchestrator,
+}
+
 print("Imported all Jobs successfully!")
\ No newline at end of file
@@ -65,19 +65,20 @@ class AttendanceFullOrchestrator:
             ).split()
             results = []
             if farmer_external_ids:
-                for farmer_external_id in farmer_external_ids:
-                    transformed_data = self.transformer.transform(
-                        payload, farmer_external_id, id_column
-                    )
-                    result = self.service.upsert(transformed_data, created_by_id)
-                    results.append(result.id)
+                # Resolve every farmer in one query; reports all unknown IDs at once
+                self.resolver.prefetch([(Farmer, id_column, farmer_external_ids)])
+
+                transformed = [
+                    self.transformer.transform(payload, farmer_external_id, id_column)
+                    for farmer_external_id in farmer_external_ids
+                ]
+                transformed = [data for data in transformed if data is not None]
+
+                # One multi-row upsert for every participant
+                records = self.service.upsert_many(transformed, created_by_id)
+                ids = {record.submission_id: record.id for record in records}
+                results = [ids[data.submission_id] for data in transformed]
 
-                    logger.info(
-                        {
-                            "message": f"Upserted attendance with record ID: '{result.id}'"
-                        }
-                    )
-                    
             final_result = finalResult(id=results)
             
             return final_result
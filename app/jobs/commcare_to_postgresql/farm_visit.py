@@ -1,3 +1,5 @@
+from typing import List
+from uuid import UUID
 from sqlalchemy.orm import Session
 from services import (
     ForeignKeyResolver,
@@ -8,6 +10,7 @@ from services import (
     FarmService,
     CoffeeVarietyService,
     CheckService,
+    unchanged_record,
 )
 from transformations import (
     FarmVisitTransformer,
@@ -21,13 +24,19 @@ from transformations import (
 from models import (
     FarmVisit,
     FVBestPractice,
-    FVBestPracticeAnswer,
     Image,
     Farm,
     CoffeeVariety,
     Check,
 )
-from core import logger, FV_BP_TYPE, FV_BP_MULTISELECT, FV_QUESTIONS_IGNORE_LIST
+from schemas import FVBestPracticeAnswerCreate
+from core import (
+    logger,
+    payload_hash,
+    FV_BP_TYPE,
+    FV_BP_MULTISELECT,
+    FV_QUESTIONS_IGNORE_LIST,
+)
 from jobs.commcare_to_postgresql.participant_registration_and_update import ParticipantRegistrationAndUpdateOrchestrator
 
 
@@ -59,6 +68,17 @@ class FarmVisitOrchestrator:
     def process_data(self, raw_payload: dict, created_by_id: str):
         """Entry point for farm visit processing"""
 
+        # Skip resubmissions of a payload that was already processed
+        digest = payload_hash(raw_payload)
+        unchanged = unchanged_record(
+            self.db,
+            FarmVisit,
+            self.farm_visit_transformer.submission_id(raw_payload),
+            digest,
+        )
+        if unchanged is not None:
+            return unchanged
+
         # Process participant registration
         pr_registration_fv = (
             raw_payload.get("form", {}).get("survey_type", "") == "Farm Visit Full - PR"
@@ -70,7 +90,9 @@ class FarmVisitOrchestrator:
             logger.info({"message": "Skipping participant registration"})
 
         # Process farm visit data
-        return self.process_farm_visit(raw_payload, created_by_id)
+        result = self.process_farm_visit(raw_payload, created_by_id)
+        result.payload_hash = digest
+        return result
 
     def process_farm_visit(self, raw_payload: dict, created_by_id: str) -> FarmVisit:
         """Complete workflow for processing farm visit payload"""
@@ -268,8 +290,9 @@ class FarmVisitOrchestrator:
 
             logger.info({f"Upserted fv best practice with record ID: '{result.id}'"})
 
-            # Step 4: Upsert the Best practice answers
+            # Step 4: Upsert the Best practice answers in a single batch
             best_practice_answers: dict = bp_payload
+            transformed_answers = []
 
             if best_practice_answers:
                 for question, answer in best_practice_answers.items():
@@ -283,26 +306,24 @@ class FarmVisitOrchestrator:
                     elif question in FV_BP_MULTISELECT:
                         multiselect = answer.split(" ")
                         for ans in multiselect:
-                            self.process_fv_best_practice_answers(
-                                raw_payload=raw_payload,
-                                bp=bp,
-                                bp_question=question,
-                                bp_answer=ans,
-                                multiselect=True,
-                                other=other,
-                                created_by_id=created_by_id,
+                            transformed_answers.append(
+                                self.fv_best_practice_answer_transformer.transform(
+                                    raw_payload, bp, question, ans, True, other
+                                )
                             )
                     else:
-                        self.process_fv_best_practice_answers(
-                            raw_payload=raw_payload,
-                            bp=bp,
-                            bp_question=question,
-                            bp_answer=answer,
-                            multiselect=False,
-                            other=other,
-                            created_by_id=created_by_id,
+                        transformed_answers.append(
+                            self.fv_best_practice_answer_transformer.transform(
+                                raw_payload, bp, question, answer, False, other
+                            )
                         )
 
+            if transformed_answers:
+                self.process_fv_best_practice_answers(
+                    transformed_answers=transformed_answers,
+                    created_by_id=created_by_id,
+                )
+
             # Step 4: Upsert associated images if any
             if best_practice_answers:
                 for question, answer in best_practice_answers.items():
@@ -343,31 +364,17 @@ class FarmVisitOrchestrator:
 
     def process_fv_best_practice_answers(
         self,
-        raw_payload: dict,
-        bp: str,
-        bp_question: str,
-        bp_answer: str,
-        multiselect: bool,
-        other: str,
+        transformed_answers: List[FVBestPracticeAnswerCreate],
         created_by_id: str,
-    ) -> FVBestPracticeAnswer:
-        """Function to process the best practice answers"""
+    ) -> List[UUID]:
+        """Function to bulk upsert the best practice answers of one best practice"""
         try:
-            # Step 1: Parse raw JSON into Pydantic schema
-            payload = raw_payload
-
-            # Step 2: Transform payload (includes foreign key resolution)
-            transformed_data = self.fv_best_practice_answer_transformer.transform(
-                payload, bp, bp_question, bp_answer, multiselect, other
-            )
-
-            # Step 3: Upsert to database
-            result = self.fv_best_practice_answer_service.upsert(
-                transformed_data, created_by_id
+            result = self.fv_best_practice_answer_service.bulk_upsert(
+                transformed_answers, created_by_id
             )
 
             logger.info(
-                {f"Upserted fv best practice answer with record ID: '{result.id}'"}
+                {f"Upserted {len(result)} fv best practice answers"}
             )
 
             return result
@@ -1,10 +1,12 @@
+from typing import Iterable, Iterator, List
+from uuid import UUID
 from sqlalchemy.orm import Session
-from core import logger, ALLOWED_SURVEYS, SURVEY_TRANSFORMATIONS
+from core import logger, payload_hash, ALLOWED_SURVEYS, SURVEY_TRANSFORMATIONS
 from models import (
     WetmillVisit,
     WVSurveyResponse,
-    WVSurveyQuestionResponse,
 )
+from schemas import WVSurveyQuestionResponseCreate
 from transformations import (
     WetmillVisitTransformer,
     WVSurveyResponseTransformer,
@@ -15,6 +17,7 @@ from services import (
     WetmillVisitService,
     WVSurveyResponseService,
     WVSurveyQuestionResponseService,
+    unchanged_record,
 )
 
 
@@ -36,8 +39,21 @@ class WetmillVisitOrchestrator:
     def process_data(self, raw_payload: dict, created_by_id: str):
         """Complete workflow for processing wetmill visit"""
 
+        # Skip resubmissions of a payload that was already processed
+        digest = payload_hash(raw_payload)
+        unchanged = unchanged_record(
+            self.db,
+            WetmillVisit,
+            self.wetmill_visit_transformer.submission_id(raw_payload),
+            digest,
+        )
+        if unchanged is not None:
+            return unchanged
+
         # 1. Process wetmill visit
-        return self.process_wetmill_visit(raw_payload, created_by_id)
+        result = self.process_wetmill_visit(raw_payload, created_by_id)
+        result.payload_hash = digest
+        return result
 
     def process_wetmill_visit(
         self, raw_payload: dict, created_by_id: str
@@ -106,76 +122,16 @@ class WetmillVisitOrchestrator:
             
             logger.info({f"Upserted wv survey response with record ID: '{result.id}'"})
 
-            # Insert question responses
-            for section, sec_content in content.items():
-                # handle multiple answers questions on top level
-                if section == "general_feedback":
-                    continue
-                if isinstance(sec_content, list):
-                    for item in sec_content:
-                        item_index = str(sec_content.index(item) + 1)
-
-                        submission_id = f"SQR-{payload.get("id")}-{survey_name}-{section}-{item_index}"
-
-                        self.process_survey_question_response(
-                            payload=payload,
-                            survey_type=survey_name,
-                            section_name=section,
-                            question_name=section,
-                            answer=item,
-                            submission_id=submission_id,
-                            created_by_id=created_by_id,
-                        )
-
-                # Nested questions
-                elif isinstance(sec_content, dict):
-                    for q_name, ans in sec_content.items():
-                        # handle multiple answers questions in nested
-                        if isinstance(ans, list):
-                            for item in ans:
-                                if q_name == "general_feedback":
-                                    continue
-                                item_index = str(ans.index(item) + 1)  # 1-based index
-                                submission_id = f"SQR-{payload.get("id")}-{survey_name}-{section}-{q_name}-{item_index}"
-                                self.process_survey_question_response(
-                                    payload=payload,
-                                    survey_type=survey_name,
-                                    section_name=section,
-                                    question_name=q_name,
-                                    answer=item,
-                                    submission_id=submission_id,
-                                    created_by_id=created_by_id,
-                                )
-                        else:
-                            # Skip label fields
-                            if q_name.endswith("_label") or q_name == "general_feedback":
-                                continue
-                            submission_id = f"SQR-{payload.get("id")}-{survey_name}-{section}-{q_name}"
-                            self.process_survey_question_response(
-                                payload=payload,
-                                survey_type=survey_name,
-                                section_name=section,
-                                question_name=q_name,
-                                answer=ans,
-                                submission_id=submission_id,
-                                created_by_id=created_by_id,
-                            )
-                # Single value questions or flags
-                else:
-                    # Skip top-level label or survey keys
-                    if section.endswith("_label") or section.startswith("survey_") or section == "general_feedback":
-                        continue
-                    submission_id = f"SQR-{payload.get("id")}-{survey_name}-{section}"
-                    print("Passing through this. . .")
-                    self.process_survey_question_response(
-                        payload=payload,
-                        survey_type=survey_name,
-                        section_name=None,
-                        question_name=section,
-                        answer=sec_content,
-                        submission_id=submission_id,
-                        created_by_id=created_by_id,
-                    )
+            # Insert question responses in bulk under the survey response above
+            self.process_survey_question_responses(
+                question_responses=self.iter_survey_question_responses(
+                    payload=payload,
+                    survey_name=survey_name,
+                    content=content,
+                    survey_response_id=result.id,
+                ),
+                created_by_id=created_by_id,
+            )
 
             return result
 
@@ -191,34 +147,100 @@ class WetmillVisitOrchestrator:
             self.db.rollback()
             raise
 
-    def process_survey_question_response(
+    def iter_survey_question_responses(
         self,
         payload: dict,
-        survey_type: str,
-        section_name: str,
-        question_name: str,
-        answer,
-        submission_id,
+        survey_name: str,
+        content: dict,
+        survey_response_id: UUID,
+    ) -> Iterator[WVSurveyQuestionResponseCreate]:
+        """
+        Walk the sections and questions of a transformed survey and yield one
+        WVSurveyQuestionResponseCreate per answer.
+        """
+        for section, sec_content in content.items():
+            # handle multiple answers questions on top level
+            if section == "general_feedback":
+                continue
+            if isinstance(sec_content, list):
+                for item in sec_content:
+                    item_index = str(sec_content.index(item) + 1)
+
+                    submission_id = f"SQR-{payload.get("id")}-{survey_name}-{section}-{item_index}"
+
+                    yield self.wv_survey_question_response_transformer.transform(
+                        payload=payload,
+                        survey_type=survey_name,
+                        section_name=section,
+                        question_name=section,
+                        answer=item,
+                        submission_id=submission_id,
+                        survey_response_id=survey_response_id,
+                    )
+
+            # Nested questions
+            elif isinstance(sec_content, dict):
+                for q_name, ans in sec_content.items():
+                    # handle multiple answers questions in nested
+                    if isinstance(ans, list):
+                        for item in ans:
+                            if q_name == "general_feedback":
+                                continue
+                            item_index = str(ans.index(item) + 1)  # 1-based index
+                            submission_id = f"SQR-{payload.get("id")}-{survey_name}-{section}-{q_name}-{item_index}"
+                            yield self.wv_survey_question_response_transformer.transform(
+                                payload=payload,
+                                survey_type=survey_name,
+                                section_name=section,
+                                question_name=q_name,
+                                answer=item,
+                                submission_id=submission_id,
+                                survey_response_id=survey_response_id,
+                            )
+                    else:
+                        # Skip label fields
+                        if q_name.endswith("_label") or q_name == "general_feedback":
+                            continue
+                        submission_id = f"SQR-{payload.get("id")}-{survey_name}-{section}-{q_name}"
+                        yield self.wv_survey_question_response_transformer.transform(
+                            payload=payload,
+                            survey_type=survey_name,
+                            section_name=section,
+                            question_name=q_name,
+                            answer=ans,
+                            submission_id=submission_id,
+                            survey_response_id=survey_response_id,
+                        )
+            # Single value questions or flags
+            else:
+                # Skip top-level label or survey keys
+                if section.endswith("_label") or section.startswith("survey_") or section == "general_feedback":
+                    continue
+                submission_id = f"SQR-{payload.get("id")}-{survey_name}-{section}"
+                yield self.wv_survey_question_response_transformer.transform(
+                    payload=payload,
+                    survey_type=survey_name,
+                    section_name=None,
+                    question_name=section,
+                    answer=sec_content,
+                    submission_id=submission_id,
+                    survey_response_id=survey_response_id,
+                )
+
+    def process_survey_question_responses(
+        self,
+        question_responses: Iterable[WVSurveyQuestionResponseCreate],
         created_by_id,
-    ) -> WVSurveyQuestionResponse:
+    ) -> List[UUID]:
         """
-        Create and add a WVSurveyQuestionResponse for a given answer.
+        Bulk upsert the WVSurveyQuestionResponses of one survey response.
         """
         try:
-            transformed_data = self.wv_survey_question_response_transformer.transform(
-                payload=payload,
-                survey_type=survey_type,
-                section_name=section_name,
-                question_name=question_name,
-                answer=answer,
-                submission_id=submission_id,
-            )
-
-            result = self.wv_survey_question_response_service.upsert(
-                transformed_data, created_by_id
+            result = self.wv_survey_question_response_service.bulk_upsert(
+                question_responses, created_by_id
             )
             logger.info(
-                {f"Upserted wv survey question response with record ID: '{result.id}'"}
+                {f"Upserted {len(result)} wv survey question responses"}
             )
             return result
         except ValueError as e:
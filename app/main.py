@@ -1,22 +1,35 @@
 import os
-from flask import Flask, request, jsonify
+import gzip
+import json
+import time
+import uuid
+import base64
+from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor
+from flask import Flask, Response, request, jsonify, stream_with_context
 from core import (
     logger,
+    TTLCache,
+    WriteBehindBuffer,
     init_pg_db,
-    SessionLocal,
-    save_to_firestore,
-    update_firestore_status,
+    session_scope,
+    track_job,
+    PG_POOL_CAPACITY,
+    migrate_doc_ids,
+    next_retry_at,
     init_fs_db,
+    get_job_queue,
+    JobBusyError,
+    get_collection,
+    extract_job_name,
     MIGRATED_FORM_TYPES,
 )
-from jobs.commcare_to_postgresql import (
-    AttendanceFullOrchestrator as AFJob,
-    AttendanceLightOrchestrator as ALJob,
-    ObservationOrchestrator as OBJob,
-    FarmVisitOrchestrator as FVJob,
-    ParticipantRegistrationAndUpdateOrchestrator as PJob,
-    WetmillRegistrationOrchestrator as WRJob,
-    WetmillVisitOrchestrator as WVJob,
+from jobs.commcare_to_postgresql import JOB_MAPPING
+from services import (
+    reference_cache,
+    UnresolvedReferenceError,
+    dependency_key,
+    provided_refs,
 )
 from google.cloud.firestore import FieldFilter
 from google.cloud import firestore
@@ -26,9 +39,92 @@ load_dotenv()
 
 SYSTEM_ID = os.getenv("SYSTEM_USER_ID_TEST")  # Change when deploying to GCP
 MAX_RETRIES = 3
+# Number of jobs processed in parallel per request. Each worker holds its own
+# session, so the effective value is capped by the Postgres pool capacity.
+PROCESS_JOBS_WORKERS = int(os.getenv("PROCESS_JOBS_WORKERS", "4"))
+# Jobs claimed per chunk, and the default time budget of a ?drain=1 request.
+# Keep the budget below the Cloud Run request timeout.
+PROCESS_JOBS_CHUNK = int(os.getenv("PROCESS_JOBS_CHUNK", "10"))
+DRAIN_BUDGET_S = float(os.getenv("DRAIN_BUDGET_S", "240"))
+# Cap on the number of failures echoed back by a drain run
+DRAIN_MAX_REPORTED_FAILURES = 100
+# Jobs slower than this log their metrics even when they succeed
+SLOW_JOB_MS = float(os.getenv("SLOW_JOB_MS", "10000"))
+# Identifies this instance as the owner of the job leases it takes
+INSTANCE_ID = f"{os.getenv('K_REVISION', 'local')}-{uuid.uuid4().hex[:8]}"
+# Statuses reported by /status-count, and how long its counts are reused
+JOB_STATUSES = ["new", "processing", "parked", "failed", "completed"]
+STATUS_COUNT_CACHE_TTL_S = float(os.getenv("STATUS_COUNT_CACHE_TTL_S", "10"))
+STATUS_COUNT_WORKERS = 8
+# Page size of the paginated listings (/get-payload, /failed-jobs)
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 1000
+# Fast-ack mode of /save-payload: payloads are acked once buffered and
+# written to Firestore in batches by a background thread
+WRITE_BEHIND_ENABLED = os.getenv("WRITE_BEHIND_ENABLED", "false").lower() in ["1", "true", "yes"]
+WRITE_BEHIND_MAX_ITEMS = int(os.getenv("WRITE_BEHIND_MAX_ITEMS", "1000"))
+WRITE_BEHIND_BATCH_SIZE = int(os.getenv("WRITE_BEHIND_BATCH_SIZE", "200"))
+WRITE_BEHIND_FLUSH_S = float(os.getenv("WRITE_BEHIND_FLUSH_S", "0.5"))
+WRITE_BEHIND_RETRY_AFTER_S = int(os.getenv("WRITE_BEHIND_RETRY_AFTER_S", "5"))
+# Fields read by the /failed-jobs listing
+FAILED_JOB_FIELDS = ["job_id", "job_name", "run_retries", "last_retried_at"]
 
 app = Flask(__name__)
-fs_db = init_fs_db()
+status_count_cache = TTLCache(maxsize=32, ttl=STATUS_COUNT_CACHE_TTL_S)
+
+
+def _flush_payloads(items):
+    """Write buffered (collection, payload, job_name) items to the queue,
+    returning the items that were not stored"""
+    by_collection = {}
+    for collection, payload, job_name in items:
+        # Last delivery of a form wins, as with synchronous saves
+        by_collection.setdefault(collection, {})[payload["id"]] = (payload, job_name)
+
+    unstored = []
+    for collection, pending in by_collection.items():
+        results = job_queue.save_many(collection, list(pending.values()))
+        failed = [job_id for job_id, r in results.items() if r["status"] == "failed"]
+        if failed:
+            logger.error(
+                {"message": "Buffered payloads not stored", "collection": collection, "job_ids": failed}
+            )
+            unstored.extend((collection, *pending[job_id]) for job_id in failed)
+    return unstored
+
+
+def _spill_payloads(items):
+    """Log buffered payloads that could not be stored in full, so they can
+    be recovered from the logs and re-sent"""
+    for collection, payload, job_name in items:
+        logger.error(
+            {
+                "message": "Write-behind payload spilled",
+                "collection": collection,
+                "job_id": payload.get("id"),
+                "job_name": job_name,
+                "payload": payload,
+            }
+        )
+
+
+payload_buffer = (
+    WriteBehindBuffer(
+        _flush_payloads,
+        maxsize=WRITE_BEHIND_MAX_ITEMS,
+        batch_size=WRITE_BEHIND_BATCH_SIZE,
+        flush_interval_s=WRITE_BEHIND_FLUSH_S,
+        spill_fn=_spill_payloads,
+    )
+    if WRITE_BEHIND_ENABLED
+    else None
+)
+if payload_buffer is not None:
+    # Installed at import, on the main thread; the flusher starts on first use
+    payload_buffer.install_shutdown_hooks()
+# Where payloads are queued (JOB_QUEUE_BACKEND). The Firestore client is only
+# created once something actually uses it.
+job_queue = get_job_queue()
 
 
 def main():
@@ -37,66 +133,53 @@ def main():
     logger.info({"message": "Database initialized!"})
 
 
-# -------------------------------------
-# JOB MAPPING
-# -------------------------------------
-job_mapping = {
-    "Farmer Registration": PJob,
-    "Attendance Full - Current Module": AFJob,
-    "Edit Farmer Details": PJob,
-    "Training Observation": OBJob,
-    "Attendance Light - Current Module": ALJob,
-    "Demo Plot Observation": OBJob,
-    "Farm Visit Full": FVJob,
-    "Farm Visit - AA": FVJob,
-    "Field Day Farmer Registration": PJob,
-    "Field Day Attendance Full": AFJob,
-    "Wet Mill Registration Form": WRJob,
-    "Wet Mill Visit": WVJob,
-}
-
-
 # -------------------------------------
 # SAVE PAYLOAD
 # -------------------------------------
 @app.route("/save-payload/<source>", methods=["POST"])
 def save_payload(source: str):
-    """Webhook to receive data and store in Firestore"""
+    """Webhook to receive data and store in Firestore.
+
+    With WRITE_BEHIND_ENABLED the payload is only validated and buffered,
+    and the request is acked with 202 before it reaches Firestore. A full
+    buffer answers 503 with Retry-After.
+    """
     payload = request.get_json()
     if not payload:
         return jsonify({"error": "Invalid JSON payload"}), 400
 
-    job_name = _extract_job_name(source, payload)
+    job_name = extract_job_name(source, payload)
     if not job_name:
         return jsonify({"error": "Job name not provided"}), 422
 
     request_id = payload.get("id")
-    collection = _get_collection(source)
+    collection = get_collection(source)
 
     try:
-        if job_name in MIGRATED_FORM_TYPES:
-            existing = (
-                fs_db.collection(collection)
-                .where(filter=FieldFilter("job_id", "==", request_id))
-                .limit(1)
-                .get()
+        if job_name in MIGRATED_FORM_TYPES and payload_buffer and request_id:
+            if not payload_buffer.offer((collection, payload, job_name)):
+                logger.warning(
+                    {"message": "Write-behind buffer full", "job_id": request_id}
+                )
+                response = jsonify({"error": "Buffer full, retry later"})
+                response.headers["Retry-After"] = str(WRITE_BEHIND_RETRY_AFTER_S)
+                return response, 503
+
+            return (
+                jsonify(
+                    {
+                        "status": "queued",
+                        "job_name": job_name,
+                        "doc_id": job_queue.expected_doc_id(collection, request_id),
+                        "job_id": request_id,
+                    }
+                ),
+                202,
             )
 
-            if existing:
-                doc_id = existing[0].id
-                update_firestore_status(
-                    doc_id=doc_id,
-                    status="new",
-                    collection=collection,
-                    fields={
-                        "payload": payload,
-                        "job_name": job_name,
-                        "run_retries": 0,
-                        "updated_at": firestore.SERVER_TIMESTAMP,
-                    },
-                )
-            else:
-                doc_id = save_to_firestore(payload, job_name, "new", collection)
+        if job_name in MIGRATED_FORM_TYPES:
+            # Keyed by form ID, so a re-delivered form resets its existing doc
+            doc_id = job_queue.save(collection, payload, job_name)
 
             logger.info(
                 {
@@ -111,6 +194,10 @@ def save_payload(source: str):
                 {"message": "Job skipped", "job_name": job_name, "job_id": request_id}
             )
 
+    except JobBusyError as e:
+        logger.warning({"message": str(e), "job_id": request_id})
+        return jsonify({"error": str(e)}), 503
+
     except Exception as e:
         logger.error(
             {"message": "Failed to save payload", "job_id": request_id, "error": str(e)}
@@ -130,27 +217,102 @@ def save_payload(source: str):
     )
 
 
+# -------------------------------------
+# SAVE PAYLOADS (BULK)
+# -------------------------------------
+@app.route("/save-payloads/<source>", methods=["POST"])
+def save_payloads(source: str):
+    """Bulk webhook for backfills.
+
+    Accepts a JSON array or NDJSON (one payload per line), optionally
+    gzip-compressed. Each payload goes through the same job name and
+    MIGRATED_FORM_TYPES filtering as /save-payload; repeated IDs within the
+    batch keep only their last occurrence. Returns one result per item, in
+    request order.
+    """
+    collection = get_collection(source)
+
+    try:
+        payloads = _parse_bulk_body()
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    results = []
+    accepted = {}  # job_id -> index of the occurrence that gets stored
+    for index, payload in enumerate(payloads):
+        if isinstance(payload, Exception) or not isinstance(payload, dict):
+            error = str(payload) if isinstance(payload, Exception) else "Invalid JSON payload"
+            results.append({"index": index, "status": "rejected", "error": error})
+            continue
+
+        request_id = payload.get("id")
+        job_name = extract_job_name(source, payload)
+        result = {"index": index, "job_id": request_id, "job_name": job_name}
+        results.append(result)
+
+        if not job_name:
+            result.update({"status": "rejected", "error": "Job name not provided"})
+        elif not request_id:
+            result.update({"status": "rejected", "error": "Payload id not provided"})
+        elif job_name not in MIGRATED_FORM_TYPES:
+            result["status"] = "skipped"
+        else:
+            if request_id in accepted:
+                results[accepted[request_id]]["status"] = "duplicate"
+            accepted[request_id] = index
+            result.update({"status": "pending", "payload": payload})
+
+    to_store = [results[index] for index in accepted.values()]
+    try:
+        stored = job_queue.save_many(
+            collection, [(r.pop("payload"), r["job_name"]) for r in to_store]
+        )
+    except Exception as e:
+        logger.error({"message": "Failed to save payloads", "error": str(e)})
+        return jsonify({"error": str(e)}), 500
+
+    for result in to_store:
+        result.update(stored[result["job_id"]])
+    for result in results:
+        result.pop("payload", None)
+
+    summary = {}
+    for result in results:
+        summary[result["status"]] = summary.get(result["status"], 0) + 1
+
+    logger.info({"message": "Bulk payloads stored", "collection": collection, **summary})
+    return jsonify({"summary": summary, "results": results}), 200
+
+
 # -------------------------------------
 # PROCESS JOBS (NEW)
 # -------------------------------------
 @app.route("/process-jobs/<source>", methods=["GET"])
 def process_jobs(source: str):
-    """Process all 'new' jobs from Firestore"""
-    collection = _get_collection(source)
-    docs = (
-        fs_db.collection(collection)
-        .where(filter=FieldFilter("status", "==", "new"))
-        .limit(10)
-        .get()
-    )
+    """Process 'new' jobs from Firestore.
+
+    By default a single chunk is processed. With ?drain=1 chunks are claimed
+    and processed until the queue is empty or ?budget_s is nearly used up.
+    """
+    collection = get_collection(source)
+    workers = _get_workers()
+    chunk_size = max(1, _get_int_arg("chunk", PROCESS_JOBS_CHUNK))
+
+    # Fail jobs abandoned by crashed or timed-out workers first, so they
+    # are retried or dead-lettered like any other failure
+    job_queue.reap_expired(collection, MAX_RETRIES)
+
+    if request.args.get("drain", "").lower() in ["1", "true", "yes"]:
+        budget_s = _get_float_arg("budget_s", DRAIN_BUDGET_S)
+        summary = _drain_jobs(collection, chunk_size, workers, budget_s)
+        return jsonify(summary), 200
+
+    docs = _claim_new_jobs(collection, chunk_size)
 
     if not docs:
         return jsonify({"message": "No new jobs found"}), 404
 
-    results = [
-        _process_and_update_job(d.id, d.to_dict(), collection, is_retry=False)
-        for d in docs
-    ]
+    results = _run_jobs(docs, collection, is_retry=False, workers=workers)
     return jsonify({"processed": len(results), "results": results}), 200
 
 
@@ -161,7 +323,7 @@ def process_jobs(source: str):
 @app.route("/retry-job/<source>/<job_id>", methods=["GET"])
 def retry_job(source: str, job_id: str):
     """Retry jobs (single, bulk, or auto-retry failed)."""
-    collection = _get_collection(source)
+    collection = get_collection(source)
     job_ids = []
 
     try:
@@ -171,45 +333,24 @@ def retry_job(source: str, job_id: str):
 
         # 1: Single job retry
         if job_id:
-            docs = (
-                fs_db.collection(collection)
-                .where(filter=FieldFilter("job_id", "==", job_id))
-                .limit(1)
-                .get()
-            )
+            docs = job_queue.claim_by_ids(collection, [job_id], INSTANCE_ID)
 
         # 2: Bulk retry by list of IDs
         elif job_ids:
-            docs = []
-            for jid in job_ids:
-                res = (
-                    fs_db.collection(collection)
-                    .where(filter=FieldFilter("job_id", "==", jid))
-                    .limit(1)
-                    .get()
-                )
-                if res:
-                    docs.append(res[0])
+            docs = job_queue.claim_by_ids(collection, job_ids, INSTANCE_ID)
 
-        # 3: Auto-retry failed jobs
+        # 3: Auto-retry failed jobs whose backoff has elapsed
         else:
-            docs = (
-                fs_db.collection(collection)
-                .where(filter=FieldFilter("status", "==", "failed"))
-                .where(filter=FieldFilter("run_retries", "<", MAX_RETRIES))
-                .limit(10)
-                .get()
-            )
+            docs = job_queue.claim_due(collection, 10, INSTANCE_ID, MAX_RETRIES)
 
         if not docs:
             return jsonify({"error": "No jobs found to retry"}), 404
 
-        results = []
-        for d in docs:
-            result = _process_and_update_job(
-                d.id, d.to_dict(), collection, is_retry=True
-            )
-            results.append({"job_id": d.id, "status": "retried", "result": result})
+        job_results = _run_jobs(docs, collection, is_retry=True, workers=_get_workers())
+        results = [
+            {"job_id": d.id, "status": "retried", "result": result}
+            for d, result in zip(docs, job_results)
+        ]
 
         return jsonify({"Retried": len(results), "results": results}), 200
 
@@ -218,41 +359,104 @@ def retry_job(source: str, job_id: str):
         return jsonify({"error": str(e)}), 500
 
 
+# -------------------------------------
+# REQUEUE DEAD-LETTERED JOBS
+# -------------------------------------
+@app.route("/requeue-dead-letter/<source>", methods=["POST"])
+def requeue_dead_letter(source: str):
+    """Give dead-lettered jobs (by job_id) a fresh retry budget"""
+    collection = get_collection(source)
+    data = request.get_json(silent=True) or {}
+    job_ids = data.get("ids", [])
+    if not job_ids:
+        return jsonify({"error": "No job ids provided"}), 400
+
+    try:
+        requeued = job_queue.requeue_dead_letters(collection, job_ids)
+    except Exception as e:
+        logger.error({"message": "Failed to requeue dead letters", "error": str(e)})
+        return jsonify({"error": str(e)}), 500
+
+    return jsonify({"requeued": len(requeued), "job_ids": requeued}), 200
+
+
 # -------------------------------------
 # JOB STATUS SUMMARY
 # -------------------------------------
 @app.route("/status-count/<source>", methods=["GET"])
 def status_count(source: str):
-    """Summarize jobs by status"""
-    collection = _get_collection(source)
-    statuses = ["new", "processing", "failed", "completed"]
+    """Summarize jobs by status.
 
-    summary = {}
-    for status in statuses:
-        count = (
-            fs_db.collection(collection)
-            .where(filter=FieldFilter("status", "==", status))
-            .get()
+    With ?by_job_name=1 the counts are also broken down per job name.
+    Results are cached for STATUS_COUNT_CACHE_TTL_S seconds.
+    """
+    collection = get_collection(source)
+    by_job_name = request.args.get("by_job_name", "").lower() in ["1", "true", "yes"]
+
+    cache_key = (collection, by_job_name)
+    summary = status_count_cache.get(cache_key)
+    if summary is None:
+        summary = _count_statuses(collection, by_job_name)
+        status_count_cache.set(cache_key, summary)
+
+    return jsonify(summary), 200
+
+
+# -------------------------------------
+# DOC ID MIGRATION
+# -------------------------------------
+@app.route("/migrate-doc-ids/<source>", methods=["POST"])
+def migrate_job_doc_ids(source: str):
+    """Move job docs stored under random IDs to their deterministic IDs and
+    schedule the retry of jobs that failed before retries were scheduled.
+
+    Processes one page of ?limit docs (default 500) per call; pass the
+    returned `next_cursor` as ?cursor until it is null.
+    """
+    collection = get_collection(source)
+    limit = max(1, min(_get_int_arg("limit", 500), MAX_PAGE_SIZE))
+    if job_queue.name != "firestore":
+        return _firestore_only()
+
+    try:
+        summary = migrate_doc_ids(
+            collection,
+            limit=limit,
+            start_after=request.args.get("cursor"),
+            max_retries=MAX_RETRIES,
         )
-        summary[status] = len(count)
+    except Exception as e:
+        logger.error({"message": "Doc ID migration failed", "error": str(e)})
+        return jsonify({"error": str(e)}), 500
 
     return jsonify(summary), 200
 
 
+# -------------------------------------
+# REFERENCE CACHE STATS
+# -------------------------------------
+@app.route("/cache-stats", methods=["GET"])
+def cache_stats():
+    """Hit/miss counters of the shared reference cache"""
+    return jsonify(reference_cache.stats()), 200
+
+
 # -----------------------------
 # GET PAYLOAD(S)
 # -----------------------------
 @app.route("/get-payload/<source>", defaults={"job_id": None}, methods=["GET", "POST"])
 @app.route("/get-payload/<source>/<job_id>", methods=["GET"])
 def get_payload(source: str, job_id: str):
-    """Retrieve payloads by source, optionally filtered by job_id or list of job_ids"""
-    collection = _get_collection(source)
+    """Retrieve payloads by source, optionally filtered by job_id or list of job_ids.
 
-    try:
-        # Handle optional limit (e.g. ?limit=20)
-        limit = request.args.get("limit")
-        limit = int(limit) if limit and limit.isdigit() else None
+    Without job IDs, payloads are listed newest first, one page at a time:
+    ?page_size=N (or ?limit=N) sets the page size, ?cursor takes the
+    `next_cursor` of the previous page and ?fields=a,b only reads those
+    fields of each doc.
+    """
+    collection = get_collection(source)
 
+    try:
         # Handle bulk POST
         job_ids = []
         if request.method == "POST":
@@ -261,37 +465,44 @@ def get_payload(source: str, job_id: str):
 
         if job_id:
             # Fetch single job by job_id
-            docs = (
-                fs_db.collection(collection)
-                .where(filter=FieldFilter("job_id", "==", job_id))
-                .get()
-            )
+            docs = job_queue.get_jobs(collection, [job_id])
 
         elif job_ids:
-            # Bulk fetch up to 10 IDs using Firestore "in" filter (limit imposed by Firestore)
-            chunk = job_ids[:10]
-            docs = (
-                fs_db.collection(collection)
-                .where(filter=FieldFilter("job_id", "in", chunk))
-                .get()
-            )
+            # Bulk fetch by job_ids, read directly by their doc IDs
+            docs = job_queue.get_jobs(collection, job_ids)
+
+        elif job_queue.name != "firestore":
+            return _firestore_only()
 
         else:
-            # Fetch all or limited payloads, ordered by created_at descending
-            query = fs_db.collection(collection).order_by(
-                "created_at", direction=firestore.Query.DESCENDING
+            # Page through payloads, ordered by created_at descending
+            query = (
+                init_fs_db()
+                .collection(collection)
+                .order_by("created_at", direction=firestore.Query.DESCENDING)
+                .order_by("__name__", direction=firestore.Query.DESCENDING)
+            )
+            fields = [f for f in request.args.get("fields", "").split(",") if f]
+            if fields:
+                # created_at is needed to build the next page's cursor
+                query = query.select(list(dict.fromkeys(fields + ["created_at"])))
+
+            return _stream_page(
+                query,
+                order_fields=["created_at", "__name__"],
+                items_key="records",
+                render=lambda doc: {"id": doc.id, "data": doc.to_dict()},
             )
-            if limit:
-                query = query.limit(limit)
-            docs = query.get()
 
         # --- RESPONSE ---
         if not docs:
             return jsonify({"message": "No records found"}), 404
 
-        records = [{"id": doc.id, "data": doc.to_dict()} for doc in docs]
+        records = [{"id": doc.id, "data": doc.data} for doc in docs]
         return jsonify(records), 200
 
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
     except Exception as e:
         logger.error({"message": "Fetch error", "error": str(e)})
         return jsonify({"error": "Failed to fetch", "details": str(e)}), 500
@@ -302,117 +513,484 @@ def get_payload(source: str, job_id: str):
 # -----------------------------
 @app.route("/failed-jobs/<source>", methods=["GET"])
 def get_failed_jobs(source: str):
-    """Get all failed jobs (summary, without full payloads)"""
-    collection = _get_collection(source)
-    docs = (
-        fs_db.collection(collection)
+    """Get failed jobs (summary, without full payloads), one page at a time.
+
+    ?page_size=N sets the page size and ?cursor takes the `next_cursor` of
+    the previous page.
+    """
+    collection = get_collection(source)
+    if job_queue.name != "firestore":
+        return _firestore_only()
+
+    query = (
+        init_fs_db()
+        .collection(collection)
         .where(filter=FieldFilter("status", "==", "failed"))
-        .get()
+        .order_by("__name__")
+        .select(FAILED_JOB_FIELDS)
     )
 
-    jobs = [
-        {
-            "job_id": d.to_dict().get("job_id"),
-            "job_name": d.to_dict().get("job_name"),
-            "run_retries": d.to_dict().get("run_retries"),
-            "last_retried_at": d.to_dict().get("last_retried_at"),
-        }
-        for d in docs
-    ]
-    return jsonify({"failed_count": len(jobs), "jobs": jobs}), 200
+    def render(doc):
+        data = doc.to_dict()
+        return {field: data.get(field) for field in FAILED_JOB_FIELDS}
+
+    try:
+        return _stream_page(
+            query,
+            order_fields=["__name__"],
+            items_key="jobs",
+            render=render,
+            count_key="failed_count",
+        )
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
 
 
 # -------------------------------------
 # INTERNAL HELPERS
 # -------------------------------------
-def _get_collection(source: str):
-    if source.lower() in ["commcare", "cc"]:
-        return "commcare_payloads"
-    elif source.lower() in ["postgres", "pg", "postgresql"]:
-        return "postgres_payloads"
+def _count_statuses(collection: str, by_job_name=False):
+    """Count jobs per status (and per job name) with aggregation queries"""
+    keys = [(status, None) for status in JOB_STATUSES]
+    if by_job_name:
+        keys += [
+            (status, job_name) for status in JOB_STATUSES for job_name in JOB_MAPPING
+        ]
+
+    with ThreadPoolExecutor(max_workers=STATUS_COUNT_WORKERS) as executor:
+        counts = list(
+            executor.map(
+                lambda key: job_queue.count(collection, key[0], key[1]), keys
+            )
+        )
+
+    summary = {}
+    by_job = {}
+    for (status, job_name), count in zip(keys, counts):
+        if job_name is None:
+            summary[status] = count
+        elif count:
+            by_job.setdefault(job_name, {s: 0 for s in JOB_STATUSES})[status] = count
+
+    if by_job_name:
+        summary["by_job_name"] = by_job
+    return summary
+
+
+def _parse_bulk_body() -> list:
+    """Decode a JSON array or NDJSON request body, gunzipping it if needed.
+
+    Unparseable NDJSON lines are returned as exceptions so the caller can
+    report them per item.
+    """
+    body = request.get_data()
+    if request.headers.get("Content-Encoding", "").lower() == "gzip" or body[:2] == b"\x1f\x8b":
+        try:
+            body = gzip.decompress(body)
+        except (OSError, EOFError) as e:
+            raise ValueError(f"Invalid gzip body: {e}") from e
+
+    text = body.decode("utf-8").strip()
+    if not text:
+        raise ValueError("Empty request body")
+
+    if text.startswith("["):
+        try:
+            payloads = json.loads(text)
+        except json.JSONDecodeError as e:
+            raise ValueError(f"Invalid JSON array: {e}") from e
+        return payloads
+
+    payloads = []
+    for line in text.splitlines():
+        if not line.strip():
+            continue
+        try:
+            payloads.append(json.loads(line))
+        except json.JSONDecodeError as e:
+            payloads.append(e)
+    return payloads
+
+
+def _encode_cursor(values: list) -> str:
+    """Opaque page cursor holding the order-by values of the last doc"""
+    raw = json.dumps(
+        [{"dt": v.isoformat()} if isinstance(v, datetime) else v for v in values]
+    )
+    return base64.urlsafe_b64encode(raw.encode()).decode()
+
+
+def _decode_cursor(cursor: str) -> list:
+    try:
+        values = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        return [
+            datetime.fromisoformat(v["dt"]) if isinstance(v, dict) else v
+            for v in values
+        ]
+    except (ValueError, TypeError, KeyError) as e:
+        raise ValueError(f"Invalid cursor: {cursor}") from e
+
+
+def _stream_page(query, order_fields, items_key, render, count_key="count"):
+    """Stream one page of `query` as a JSON object.
+
+    The object holds the rendered docs under `items_key`, their count under
+    `count_key` and the `next_cursor` to pass back for the following page
+    (null on the last page). Docs are written out as they arrive instead of
+    being collected in memory first.
+    """
+    page_size = _get_int_arg("page_size", _get_int_arg("limit", DEFAULT_PAGE_SIZE))
+    page_size = max(1, min(page_size, MAX_PAGE_SIZE))
+
+    cursor = request.args.get("cursor")
+    if cursor:
+        values = _decode_cursor(cursor)
+        if len(values) != len(order_fields):
+            raise ValueError(f"Invalid cursor: {cursor}")
+        query = query.start_after(dict(zip(order_fields, values)))
+
+    # One extra doc tells whether another page follows
+    query = query.limit(page_size + 1)
+
+    def generate():
+        count = 0
+        last_doc = None
+        yield f'{{"{items_key}": ['
+        for doc in query.stream():
+            if count == page_size:
+                break
+            yield ("," if count else "") + app.json.dumps(render(doc))
+            count += 1
+            last_doc = doc
+        else:
+            last_doc = None
+
+        next_cursor = None
+        if last_doc is not None:
+            data = last_doc.to_dict()
+            next_cursor = _encode_cursor(
+                [
+                    last_doc.id if field == "__name__" else data.get(field)
+                    for field in order_fields
+                ]
+            )
+        yield f'], "{count_key}": {count}, "next_cursor": {json.dumps(next_cursor)}}}'
+
+    return Response(stream_with_context(generate()), mimetype="application/json")
+
+
+def _firestore_only():
+    return (
+        jsonify({"error": f"Not supported by the '{job_queue.name}' job queue backend"}),
+        501,
+    )
+
+
+def _get_int_arg(name: str, default: int) -> int:
+    value = request.args.get(name, "")
+    return int(value) if value.isdigit() else default
+
+
+def _get_float_arg(name: str, default: float) -> float:
+    try:
+        return float(request.args.get(name, default))
+    except (TypeError, ValueError):
+        return default
+
+
+def _get_workers():
+    """Resolve the job parallelism from ?workers=N, bounded by the PG pool"""
+    workers = _get_int_arg("workers", PROCESS_JOBS_WORKERS)
+    return max(1, min(workers, PG_POOL_CAPACITY))
+
+
+def _claim_new_jobs(collection: str, limit: int):
+    """Claim up to `limit` new jobs for this instance"""
+    return job_queue.claim_new(collection, limit, INSTANCE_ID)
+
+
+def _drain_jobs(collection: str, chunk_size: int, workers: int, budget_s: float):
+    """Process chunks of new jobs until the queue is empty or time runs out.
+
+    A new chunk is only started while the remaining budget still covers the
+    slowest chunk seen so far, so the request returns before Cloud Run's
+    request timeout kills it mid-job.
+    """
+    started = time.monotonic()
+    slowest_chunk_s = 0.0
+    summary = {
+        "processed": 0,
+        "completed": 0,
+        "parked": 0,
+        "failed": 0,
+        "chunks": 0,
+        "by_job_type": {},
+        "failures": [],
+        "stopped_reason": "empty",
+    }
+
+    while True:
+        elapsed = time.monotonic() - started
+        if elapsed + slowest_chunk_s >= budget_s:
+            summary["stopped_reason"] = "budget"
+            break
+
+        docs = _claim_new_jobs(collection, chunk_size)
+        if not docs:
+            break
+
+        chunk_started = time.monotonic()
+        results = _run_jobs(docs, collection, is_retry=False, workers=workers)
+        slowest_chunk_s = max(slowest_chunk_s, time.monotonic() - chunk_started)
+
+        summary["chunks"] += 1
+        for result in results:
+            status = result.get("status")
+            if status == "requeued":
+                status = "parked"
+            elif status not in ["completed", "parked"]:
+                status = "failed"
+            job_type = result.get("job_type") or "unknown"
+            by_type = summary["by_job_type"].setdefault(
+                job_type, {"completed": 0, "parked": 0, "failed": 0}
+            )
+
+            summary["processed"] += 1
+            summary[status] += 1
+            by_type[status] += 1
+            _add_metrics(summary, result.get("metrics"))
+            _add_metrics(by_type, result.get("metrics"))
+
+            if (
+                status == "failed"
+                and len(summary["failures"]) < DRAIN_MAX_REPORTED_FAILURES
+            ):
+                summary["failures"].append(
+                    {
+                        "job_id": result.get("job_id"),
+                        "job_type": result.get("job_type"),
+                        "error": result.get("error"),
+                    }
+                )
+
+    summary["elapsed_s"] = round(time.monotonic() - started, 2)
+    logger.info(
+        {
+            "message": "Drain finished",
+            "collection": collection,
+            **{k: v for k, v in summary.items() if k != "failures"},
+        }
+    )
+    return summary
+
+
+def _add_metrics(totals: dict, metrics: dict):
+    """Add a job's metrics to the running totals of a drain summary"""
+    if not metrics:
+        return
+    for key in ["duration_ms", "sql_statements", "rows_written"]:
+        totals[key] = round(totals.get(key, 0) + metrics[key], 1)
+    stage_ms = totals.setdefault("stage_ms", {})
+    for stage_name, ms in metrics["stage_ms"].items():
+        stage_ms[stage_name] = round(stage_ms.get(stage_name, 0) + ms, 1)
+
+
+def _run_jobs(docs, collection: str, is_retry=False, workers=1):
+    """Process queued jobs, in parallel when workers > 1.
+
+    Status transitions the queue did not commit along with the job's own
+    writes are collected and written in one batch once the whole batch has
+    finished. Jobs
+    parked on references that another job of the same batch created are
+    requeued right away; parked jobs from earlier batches are released
+    once the batch's writes are in.
+    """
+    jobs = [(d.id, d.data) for d in docs]
+
+    if workers <= 1 or len(jobs) <= 1:
+        outcomes = [
+            _process_job(doc_id, data, collection, is_retry=is_retry)
+            for doc_id, data in jobs
+        ]
     else:
-        raise ValueError(f"Invalid source: {source}")
+        with ThreadPoolExecutor(max_workers=min(workers, len(jobs))) as executor:
+            outcomes = list(
+                executor.map(
+                    lambda job: _process_job(
+                        job[0], job[1], collection, is_retry=is_retry
+                    ),
+                    jobs,
+                )
+            )
+
+    provided = set().union(*(refs for _, _, refs in outcomes))
+    for result, status_update, _ in outcomes:
+        if status_update["status"] == "parked" and set(
+            status_update["fields"]["waiting_on"]
+        ).issubset(provided):
+            # Released right away; counts as a retry like any other release
+            retries = status_update["fields"]["run_retries"] + 1
+            status_update["status"] = "new"
+            status_update["fields"].update(
+                {"waiting_on": [], "next_retry_at": None, "run_retries": retries}
+            )
+            result["status"] = "requeued"
+            result["run_retries"] = retries
+
+    pending_updates = []
+    for _, status_update, _ in outcomes:
+        if not status_update.get("staged"):
+            pending_updates.append(status_update)
+        elif status_update["fields"].get("metrics"):
+            # Only known once the job's transaction has committed
+            pending_updates.append(
+                {
+                    "doc_id": status_update["doc_id"],
+                    "status": status_update["status"],
+                    "fields": {"metrics": status_update["fields"]["metrics"]},
+                }
+            )
+    if pending_updates:
+        job_queue.write_statuses(collection, pending_updates)
+
+    if provided:
+        try:
+            job_queue.release_parked(collection, provided)
+        except Exception as e:
+            # Parked jobs still come due through their fallback next_retry_at
+            logger.error({"message": "Failed to release parked jobs", "error": str(e)})
+
+    return [result for result, _, _ in outcomes]
 
 
-def _extract_job_name(source: str, payload: dict):
-    if source.lower() in ["commcare", "cc"]:
-        job_name = payload.get("form", {}).get("@name")
-        if (
-            job_name == "Followup"
-            and payload.get("form", {}).get("survey_type", "") == "Attendance Light"
-        ):
-            job_name = "Attendance Light - Current Module"
-        return job_name
-    elif source.lower() in ["postgres", "pg", "postgresql"]:
-        return payload.get("jobType")
-    return None
+def _process_job(doc_id: str, data: dict, collection: str, is_retry=False):
+    """Process a job, recording its stage timings and SQL counts.
+
+    Returns the job result, the status update to apply for it and the
+    dependency keys of the records it created. The metrics are added to
+    both the result and the job doc.
+    """
+    with track_job() as metrics:
+        result, status_update, provided = _execute_job(
+            doc_id, data, collection, is_retry=is_retry
+        )
+
+    job_metrics = metrics.summary()
+    result["metrics"] = job_metrics
+    status_update["fields"]["metrics"] = job_metrics
+    if result["status"] != "completed" or job_metrics["duration_ms"] >= SLOW_JOB_MS:
+        logger.info(
+            {
+                "message": "Job metrics",
+                "job_id": data.get("job_id"),
+                "job_type": data.get("job_name"),
+                "status": result["status"],
+                **job_metrics,
+            }
+        )
+    return result, status_update, provided
 
 
-def _process_and_update_job(doc_id: str, data: dict, collection: str, is_retry=False):
-    """Core job processing + Firestore update"""
+def _execute_job(doc_id: str, data: dict, collection: str, is_retry=False):
+    """Core job processing"""
     try:
         job_name = data.get("job_name")
-        job_orchestrator = job_mapping.get(job_name)
+        job_orchestrator = JOB_MAPPING.get(job_name)
 
         if not job_orchestrator:
-            update_firestore_status(
-                doc_id=doc_id,
-                collection=collection,
-                status="failed",
-                fields={"error": f"Unhandled job type '{job_name}'"},
-            )
+            # Retrying cannot help, so dead-letter it straight away
+            error = f"Unhandled job type '{job_name}'"
+            status_update = {
+                "doc_id": doc_id,
+                "status": "dead_letter",
+                "fields": {
+                    "error": error,
+                    "lease_owner": None,
+                    "lease_expires_at": None,
+                },
+                "data": data,
+            }
             return {
                 "job_id": data.get("job_id"),
-                "status": "failed",
-                "error": "Job not handled",
+                "job_type": job_name,
+                "status": "dead_letter",
+                "error": error,
+                "run_retries": data.get("run_retries", 0),
+            }, status_update, set()
+
+        # One session per job, committed and closed when the job finishes.
+        # A queue in the same database commits the status change with it.
+        with session_scope() as db:
+            result = job_orchestrator(db).process_data(
+                data.get("payload"), SYSTEM_ID
+            )
+            record_id = str(result.id)
+
+            fields = {
+                "record_id": record_id,
+                "error": None,
+                "waiting_on": [],
+                "next_retry_at": None,
+                "lease_owner": None,
+                "lease_expires_at": None,
+                "updated_at": firestore.SERVER_TIMESTAMP,
             }
 
-        db = SessionLocal()
-        result = job_orchestrator(db).process_data(data.get("payload"), SYSTEM_ID)
+            if is_retry:
+                fields["run_retries"] = data.get("run_retries", 0) + 1
+                fields["last_retried_at"] = firestore.SERVER_TIMESTAMP
 
-        fields = {
-            "record_id": str(result.id),
-            "error": None,
-            "updated_at": firestore.SERVER_TIMESTAMP,
-        }
-
-        if is_retry:
-            fields["run_retries"] = data.get("run_retries", 0) + 1
-            fields["last_retried_at"] = firestore.SERVER_TIMESTAMP
-
-        update_firestore_status(
-            doc_id=doc_id, collection=collection, status="completed", fields=fields
-        )
+            status_update = {"doc_id": doc_id, "status": "completed", "fields": fields}
+            status_update["staged"] = job_queue.stage_status(
+                collection, status_update, db
+            )
+        provided = provided_refs(db)
 
         return {
             "job_id": data.get("job_id"),
             "job_type": data.get("job_name"),
             "status": "completed",
-            "record_id": str(result.id),
+            "record_id": record_id,
             "run_retries": fields.get("run_retries", data.get("run_retries", 0)),
-        }
+        }, status_update, provided
 
     except Exception as e:
         retries = (
             data.get("run_retries", 0) + 1 if is_retry else data.get("run_retries", 0)
         )
-        update_firestore_status(
-            doc_id=doc_id,
-            collection=collection,
-            status="failed",
-            fields={
+        status_update = {
+            "doc_id": doc_id,
+            "status": "failed",
+            "fields": {
                 "error": str(e),
                 "run_retries": retries,
                 "last_retried_at": firestore.SERVER_TIMESTAMP if is_retry else None,
+                "next_retry_at": next_retry_at(retries),
+                "lease_owner": None,
+                "lease_expires_at": None,
+                "updated_at": firestore.SERVER_TIMESTAMP,
             },
-        )
+        }
+        if retries >= MAX_RETRIES:
+            # Out of retries: park it in the dead-letter collection
+            status_update["status"] = "dead_letter"
+            status_update["fields"]["next_retry_at"] = None
+            status_update["data"] = data
+        elif isinstance(e, UnresolvedReferenceError):
+            # Referenced records do not exist yet: wait for the job that
+            # creates them; next_retry_at stays as the fallback
+            status_update["status"] = "parked"
+            status_update["fields"]["waiting_on"] = sorted(
+                {dependency_key(column, external_id) for column, external_id in e.missing}
+            )
+
         return {
             "job_id": data.get("job_id"),
             "job_type": data.get("job_name"),
-            "status": "failed",
+            "status": status_update["status"],
             "error": str(e),
             "run_retries": retries,
-        }
+        }, status_update, set()
 
 
 # -------------------------------------
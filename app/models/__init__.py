@@ -25,6 +25,7 @@ from .wetmill import Wetmill
 from .wetmill_visit import WetmillVisit
 from .wv_survey_response import WVSurveyResponse
 from .wv_survey_question_response import WVSurveyQuestionResponse
+from .job import Job
 
 # from .fv_question_answer import FVQuestionAnswer
 
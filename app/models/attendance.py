@@ -20,8 +20,6 @@ class Attendance(
     __table_args__ = (
         Index("idx_attendances_farmer_id", "farmer_id"),
         Index("idx_attendances_training_session_id", "training_session_id"),
-        Index("idx_attendances_submission_id", "submission_id"),
-        Index("idx_attendances_sf_id", "sf_id"),
         Index("idx_attendances_created_by_id", "created_by_id"),
         Index("idx_attendances_last_updated_by_id", "last_updated_by_id"),
         CheckConstraint(
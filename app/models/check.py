@@ -25,12 +25,10 @@ class Check(Base, AuditMixin, SoftDeleteMixin, TimestampMixin, UUIDMixin, SFIDMi
     __tablename__ = "checks"
     __table_args__ = (
         Index("idx_checks_farmer_id", "farmer_id"),
-        Index("idx_checks_submission_id", "submission_id"),
         Index("idx_checks_checker_id", "checker_id"),
         Index("idx_checks_training_session_id", "training_session_id"),
         Index("idx_checks_farm_visit_id", "farm_visit_id"),
         Index("idx_checks_observation_id", "observation_id"),
-        Index("idx_checks_sf_id", "sf_id"),
         Index("idx_checks_created_by_id", "created_by_id"),
         Index("idx_checks_last_updated_by_id", "last_updated_by_id"),
         CheckConstraint(
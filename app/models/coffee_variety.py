@@ -17,8 +17,6 @@ class CoffeeVariety(
     __tablename__ = "coffee_varieties"
     __table_args__ = (
         Index("idx_coffee_varieties_farm_id", "farm_id"),
-        Index("idx_coffee_varieties_submission_id", "submission_id"),
-        Index("idx_coffee_varieties_sf_id", "sf_id"),
         Index("idx_coffee_varieties_created_by_id", "created_by_id"),
         Index("idx_coffee_varieties_last_updated_by_id", "last_updated_by_id"),
         {"schema": SCHEMA},
@@ -29,9 +29,12 @@ class Farm(Base, AuditMixin, SFIDMixin, SoftDeleteMixin, TimestampMixin, UUIDMix
     __table_args__ = (
         Index("idx_farms_farm_visit_id", "farm_visit_id"),
         Index("idx_farms_household_id", "household_id"),
-        Index("idx_farms_submission_id", "submission_id"),
-        Index("idx_farms_sf_id", "sf_id"),
-        Index("idx_farms_tns_id", "tns_id"),
+        Index(
+            "idx_farms_submission_id_active",
+            "submission_id",
+            postgresql_include=["id"],
+            postgresql_where=text("is_deleted = false"),
+        ),
         Index("idx_farms_created_by_id", "created_by_id"),
         Index("idx_farms_last_updated_by_id", "last_updated_by_id"),
         CheckConstraint(
@@ -33,10 +33,14 @@ class FarmVisit(
         Index(
             "idx_farm_visits_visited_secondary_farmer_id", "visited_secondary_farmer_id"
         ),
-        Index("idx_farm_visits_submission_id", "submission_id"),
+        Index(
+            "idx_farm_visits_submission_id_active",
+            "submission_id",
+            postgresql_include=["id"],
+            postgresql_where=text("is_deleted = false"),
+        ),
         Index("idx_farm_visits_training_session_id", "training_session_id"),
         Index("idx_farm_visits_visiting_staff_id", "visiting_staff_id"),
-        Index("idx_farm_visits_sf_id", "sf_id"),
         Index("idx_farm_visits_created_by_id", "created_by_id"),
         Index("idx_farm_visits_last_updated_by_id", "last_updated_by_id"),
         {"schema": SCHEMA},
@@ -53,6 +57,7 @@ class FarmVisit(
         UUID(as_uuid=True), ForeignKey(f"{SCHEMA}.farmers.id"), nullable=True
     )
     submission_id = Column(String, nullable=False, unique=True)
+    payload_hash = Column(String(64), nullable=True)  # Hash of the last processed payload
     training_session_id = Column(
         UUID(as_uuid=True), ForeignKey(f"{SCHEMA}.training_sessions.id"), nullable=False
     )
@@ -29,8 +29,12 @@ class Farmer(Base, AuditMixin, SFIDMixin, SoftDeleteMixin, TimestampMixin, UUIDM
         Index("idx_farmers_household_id", "household_id"),
         Index("idx_farmers_farmer_group_id", "farmer_group_id"),
         Index("idx_farmers_tns_id", "tns_id"),
-        Index("idx_farmers_commcare_case_id", "commcare_case_id"),
-        Index("idx_farmers_sf_id", "sf_id"),
+        Index(
+            "idx_farmers_commcare_case_id_active",
+            "commcare_case_id",
+            postgresql_include=["id", "household_id"],
+            postgresql_where=text("is_deleted = false"),
+        ),
         Index("idx_farmers_created_by_id", "created_by_id"),
         Index("idx_farmers_last_updated_by_id", "last_updated_by_id"),
         CheckConstraint(
@@ -20,9 +20,12 @@ class FarmerGroup(
     __table_args__ = (
         Index("idx_farmer_groups_project_id", "project_id"),
         Index("idx_farmer_groups_responsible_staff_id", "responsible_staff_id"),
-        Index("idx_farmer_groups_tns_id", "tns_id"),
-        Index("idx_farmer_groups_commcare_case_id", "commcare_case_id"),
-        Index("idx_farmer_groups_sf_id", "sf_id"),
+        Index(
+            "idx_farmer_groups_commcare_case_id_active",
+            "commcare_case_id",
+            postgresql_include=["id"],
+            postgresql_where=text("is_deleted = false"),
+        ),
         Index("idx_farmer_groups_created_by_id", "created_by_id"),
         Index("idx_farmer_groups_last_updated_by_id", "last_updated_by_id"),
         {"schema": SCHEMA},
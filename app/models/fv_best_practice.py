@@ -19,8 +19,12 @@ class FVBestPractice(
     # Indexes and Constraints
     __table_args__ = (
         Index("idx_fv_best_practices_farm_visit_id", "farm_visit_id"),
-        Index("idx_fv_best_practices_submission_id", "submission_id"),
-        Index("idx_fv_best_practices_sf_id", "sf_id"),
+        Index(
+            "idx_fv_best_practices_submission_id_active",
+            "submission_id",
+            postgresql_include=["id"],
+            postgresql_where=text("is_deleted = false"),
+        ),
         Index("idx_fv_best_practices_created_by_id", "created_by_id"),
         Index("idx_fv_best_practices_last_updated_by_id", "last_updated_by_id"),
         {"schema": SCHEMA},
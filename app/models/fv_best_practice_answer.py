@@ -21,8 +21,6 @@ class FVBestPracticeAnswer(
         Index(
             "idx_fv_best_practice_answers_fv_best_practice_id", "fv_best_practice_id"
         ),
-        Index("idx_fv_best_practice_answers_submission_id", "submission_id"),
-        Index("idx_fv_best_practice_answers_sf_id", "sf_id"),
         Index("idx_fv_best_practice_answers_created_by_id", "created_by_id"),
         Index("idx_fv_best_practice_answers_last_updated_by_id", "last_updated_by_id"),
         Index("idx_fv_best_practice_answers_question_key", "question_key"),
@@ -29,9 +29,18 @@ class Household(
     # Indexes and Constraints
     __table_args__ = (
         Index("idx_households_farmer_group_id", "farmer_group_id"),
-        Index("idx_households_tns_id", "tns_id"),
-        Index("idx_households_commcare_case_id", "commcare_case_id"),
-        Index("idx_households_sf_id", "sf_id"),
+        Index(
+            "idx_households_tns_id_active",
+            "tns_id",
+            postgresql_include=["id"],
+            postgresql_where=text("is_deleted = false"),
+        ),
+        Index(
+            "idx_households_sf_id_active",
+            "sf_id",
+            postgresql_include=["id"],
+            postgresql_where=text("is_deleted = false"),
+        ),
         Index("idx_households_created_by_id", "created_by_id"),
         Index("idx_households_last_updated_by_id", "last_updated_by_id"),
         {"schema": SCHEMA},
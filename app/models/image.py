@@ -1,4 +1,4 @@
-from sqlalchemy import Column, String, Index
+from sqlalchemy import Column, String, Index, text
 from sqlalchemy.dialects.postgresql import UUID
 from .base import Base
 from .mixins import AuditMixin, SoftDeleteMixin, TimestampMixin, UUIDMixin
@@ -16,7 +16,12 @@ class Image(Base, AuditMixin, SoftDeleteMixin, TimestampMixin, UUIDMixin):
         Index("idx_images_image_reference_id", "image_reference_id"),
         Index("idx_images_created_by_id", "created_by_id"),
         Index("idx_images_last_updated_by_id", "last_updated_by_id"),
-        Index("idx_images_submission_id", "submission_id"),
+        Index(
+            "uq_images_submission_id",
+            "submission_id",
+            unique=True,
+            postgresql_where=text("is_deleted = false"),
+        ),
         {"schema": SCHEMA},
     )
 
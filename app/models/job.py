@@ -0,0 +1,50 @@
+from sqlalchemy import (
+    Column,
+    String,
+    Integer,
+    Text,
+    DateTime,
+    Index,
+    UniqueConstraint,
+    text,
+)
+from sqlalchemy.dialects.postgresql import ARRAY, JSONB
+from .base import Base
+from .mixins import TimestampMixin, UUIDMixin
+import os
+from dotenv import load_dotenv
+
+load_dotenv()
+SCHEMA = os.getenv("DB_SCHEMA", "public")
+
+
+class Job(Base, TimestampMixin, UUIDMixin):
+    """Queued payload of the Postgres job queue backend"""
+
+    __tablename__ = "jobs"
+    __table_args__ = (
+        UniqueConstraint("queue", "job_id", name="uq_jobs_queue_job_id"),
+        Index("idx_jobs_status_next_retry_at", "status", "next_retry_at"),
+        Index("idx_jobs_queue_status_created_at", "queue", "status", "created_at"),
+        Index("idx_jobs_waiting_on", "waiting_on", postgresql_using="gin"),
+        {"schema": SCHEMA},
+    )
+
+    # Fields
+    queue = Column(String, nullable=False)  # e.g. commcare_payloads
+    job_id = Column(String, nullable=True)  # Source form ID
+    job_name = Column(String, nullable=True)
+    payload = Column(JSONB, nullable=False)
+    status = Column(String, nullable=False, server_default="new")
+    run_retries = Column(Integer, nullable=False, server_default=text("0"))
+    last_retried_at = Column(DateTime(timezone=True), nullable=True)
+    next_retry_at = Column(DateTime(timezone=True), nullable=True)
+    waiting_on = Column(
+        ARRAY(String), nullable=False, server_default=text("'{}'::varchar[]")
+    )
+    error = Column(Text, nullable=True)
+    record_id = Column(String, nullable=True)
+    lease_owner = Column(String, nullable=True)
+    lease_expires_at = Column(DateTime(timezone=True), nullable=True)
+    dead_lettered_at = Column(DateTime(timezone=True), nullable=True)
+    metrics = Column(JSONB, nullable=True)  # Timings and SQL counts of the last run
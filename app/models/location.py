@@ -15,7 +15,6 @@ class Location(Base, AuditMixin, SFIDMixin, SoftDeleteMixin, TimestampMixin, UUI
     __tablename__ = "locations"
     __table_args__ = (
         Index("idx_locations_parent_location_id", "parent_location_id"),
-        Index("idx_locations_sf_id", "sf_id"),
         Index("idx_locations_created_by_id", "created_by_id"),
         Index("idx_locations_last_updated_by_id", "last_updated_by_id"),
         {"schema": SCHEMA},
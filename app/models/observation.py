@@ -1,4 +1,4 @@
-from sqlalchemy import Column, String, Integer, Date, Numeric, ForeignKey, Index, Enum
+from sqlalchemy import Column, String, Integer, Date, Numeric, ForeignKey, Index, Enum, text
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.orm import relationship
 from .base import Base
@@ -16,12 +16,16 @@ class Observation(
 ):
     __tablename__ = "observations"
     __table_args__ = (
-        Index("idx_observations_submission_id", "submission_id"),
+        Index(
+            "uq_observations_submission_id",
+            "submission_id",
+            unique=True,
+            postgresql_where=text("is_deleted = false"),
+        ),
         Index("idx_observations_observer_id", "observer_id"),
         Index("idx_observations_trainer_id", "trainer_id"),
         Index("idx_observations_farmer_group_id", "farmer_group_id"),
         Index("idx_observations_training_session_id", "training_session_id"),
-        Index("idx_observations_sf_id", "sf_id"),
         Index("idx_observations_created_by_id", "created_by_id"),
         Index("idx_observations_last_updated_by_id", "last_updated_by_id"),
         {"schema": SCHEMA},
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, String, Boolean, Numeric, ForeignKey, Index
+from sqlalchemy import Column, String, Boolean, Numeric, ForeignKey, Index, text
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.orm import relationship
 from .base import Base
@@ -17,8 +17,12 @@ class ObservationResult(
     __tablename__ = "observation_results"
     __table_args__ = (
         Index("idx_observation_results_observation_id", "observation_id"),
-        Index("idx_observation_results_submission_id", "submission_id"),
-        Index("idx_observation_results_sf_id", "sf_id"),
+        Index(
+            "uq_observation_results_submission_id",
+            "submission_id",
+            unique=True,
+            postgresql_where=text("is_deleted = false"),
+        ),
         Index("idx_observation_results_created_by_id", "created_by_id"),
         Index("idx_observation_results_last_updated_by_id", "last_updated_by_id"),
         Index("idx_observation_results_question_key", "question_key"),
@@ -13,7 +13,6 @@ SCHEMA = os.getenv("DB_SCHEMA", "public")
 class Program(Base, AuditMixin, TimestampMixin, SoftDeleteMixin, SFIDMixin, UUIDMixin):
     __tablename__ = "programs"
     __table_args__ = (
-        Index("idx_programs_sf_id", "sf_id"),
         Index("idx_programs_created_by_id", "created_by_id"),
         Index("idx_programs_last_updated_by_id", "last_updated_by_id"),
         {"schema": SCHEMA},
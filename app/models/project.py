@@ -16,7 +16,6 @@ class Project(Base, AuditMixin, SoftDeleteMixin, SFIDMixin, TimestampMixin, UUID
     __tablename__ = "projects"
     __table_args__ = (
         Index("idx_projects_program_id", "program_id"),
-        Index("idx_projects_project_unique_id", "project_unique_id"),
         Index("idx_projects_location_id", "location_id"),
         Index("idx_projects_created_by_id", "created_by_id"),
         Index("idx_projects_last_updated_by_id", "last_updated_by_id"),
@@ -20,8 +20,12 @@ class ProjectStaffRole(
         Index("idx_project_staff_roles_project_id", "project_id"),
         Index("idx_project_staff_roles_staff_id", "staff_id"),
         Index("idx_project_staff_roles_commcare_location_id", "commcare_location_id"),
-        Index("idx_project_staff_roles_commcare_case_id", "commcare_case_id"),
-        Index("idx_project_staff_roles_tns_id", "tns_id"),
+        Index(
+            "idx_project_staff_roles_commcare_case_id_active",
+            "commcare_case_id",
+            postgresql_include=["id", "staff_id"],
+            postgresql_where=text("is_deleted = false"),
+        ),
         Index("idx_project_staff_roles_created_by_id", "created_by_id"),
         Index("idx_project_staff_roles_last_updated_by_id", "last_updated_by_id"),
         {"schema": SCHEMA},
@@ -27,7 +27,6 @@ class TrainingModule(
     __tablename__ = "training_modules"
     __table_args__ = (
         Index("idx_training_modules_project_id", "project_id"),
-        Index("idx_training_modules_sf_id", "sf_id"),
         Index("idx_training_modules_created_by_id", "created_by_id"),
         Index("idx_training_modules_last_updated_by_id", "last_updated_by_id"),
         {"schema": SCHEMA},
@@ -30,7 +30,12 @@ class TrainingSession(
         Index("idx_training_sessions_trainer_id", "trainer_id"),
         Index("idx_training_sessions_module_id", "module_id"),
         Index("idx_training_sessions_farmer_group_id", "farmer_group_id"),
-        Index("idx_training_sessions_commcare_case_id", "commcare_case_id"),
+        Index(
+            "idx_training_sessions_commcare_case_id_active",
+            "commcare_case_id",
+            postgresql_include=["id"],
+            postgresql_where=text("is_deleted = false"),
+        ),
         Index("idx_training_sessions_created_by_id", "created_by_id"),
         Index("idx_training_sessions_last_updated_by_id", "last_updated_by_id"),
         {"schema": SCHEMA},
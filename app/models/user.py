@@ -1,4 +1,4 @@
-from sqlalchemy import Column, String, ForeignKey, Enum, Index
+from sqlalchemy import Column, String, ForeignKey, Enum, Index, text
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.orm import relationship
 from .base import Base
@@ -13,10 +13,14 @@ SCHEMA = os.getenv("DB_SCHEMA", "public")
 class User(Base, SFIDMixin, SoftDeleteMixin, TimestampMixin, UUIDMixin):
     __tablename__ = "users"
     __table_args__ = (
-        Index("idx_users_tns_id", "tns_id"),
         Index("idx_users_commcare_mobile_worker_id", "commcare_mobile_worker_id"),
         Index("idx_users_manager_id", "manager_id"),
-        Index("idx_users_sf_id", "sf_id"),
+        Index(
+            "idx_users_sf_id_active",
+            "sf_id",
+            postgresql_include=["id"],
+            postgresql_where=text("is_deleted = false"),
+        ),
         Index("idx_users_created_by_id", "created_by_id"),
         Index("idx_users_last_updated_by_id", "last_updated_by_id"),
         {"schema": SCHEMA},
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, String, ForeignKey, Integer, Index, Text, Date
+from sqlalchemy import Column, String, ForeignKey, Integer, Index, Text, Date, text
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.orm import relationship
 from .base import Base
@@ -16,7 +16,12 @@ class Wetmill(Base, SoftDeleteMixin, TimestampMixin, UUIDMixin, AuditMixin):
     __table_args__ = (
         Index("idx_wetmills_user_id", "user_id"),
         Index("idx_wetmills_wet_mill_unique_id", "wet_mill_unique_id"),
-        Index("idx_wetmills_commcare_case_id", "commcare_case_id"),
+        Index(
+            "idx_wetmills_commcare_case_id_active",
+            "commcare_case_id",
+            postgresql_include=["id", "user_id"],
+            postgresql_where=text("is_deleted = false"),
+        ),
         Index("idx_wetmills_programme", "programme"),
         Index("idx_wetmills_country", "country"),
         Index("idx_wetmills_created_by_id", "created_by_id"),
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, String, ForeignKey, Index, Date
+from sqlalchemy import Column, String, ForeignKey, Index, Date, text
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.orm import relationship
 from geoalchemy2 import Geometry
@@ -16,7 +16,12 @@ class WetmillVisit(Base, SoftDeleteMixin, TimestampMixin, UUIDMixin, AuditMixin)
     __table_args__ = (
         Index("idx_wetmill_visits_wetmill_id", "wetmill_id"),
         Index("idx_wetmill_visits_user_id", "user_id"),
-        Index("idx_wetmill_visits_submission_id", "submission_id"),
+        Index(
+            "uq_wetmill_visits_submission_id",
+            "submission_id",
+            unique=True,
+            postgresql_where=text("is_deleted = false"),
+        ),
         Index("idx_wetmill_visits_created_by_id", "created_by_id"),
         Index("idx_wetmill_visits_last_updated_by_id", "last_updated_by_id"),
         {"schema": SCHEMA},
@@ -30,6 +35,7 @@ class WetmillVisit(Base, SoftDeleteMixin, TimestampMixin, UUIDMixin, AuditMixin)
     entrance_photograph = Column(String, nullable=True)
     geo_location = Column(Geometry("POINT", srid=4326, spatial_index=False), nullable=True)
     submission_id = Column(String, nullable=False)
+    payload_hash = Column(String(64), nullable=True)  # Hash of the last processed payload
 
     # Relationship to wetmill and surveys
     wetmill = relationship("Wetmill", back_populates="visits")
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, String, ForeignKey, Index, Text, Float, Boolean, DateTime
+from sqlalchemy import Column, String, ForeignKey, Index, Text, Float, Boolean, DateTime, text
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.orm import relationship
 from geoalchemy2 import Geometry
@@ -16,7 +16,12 @@ class WVSurveyQuestionResponse(Base, SoftDeleteMixin, TimestampMixin, UUIDMixin,
     __table_args__ = (
         Index("idx_survey_question_responses_survey_response_id", "survey_response_id"),
         Index("idx_survey_question_responses_question_name", "question_name"),
-        Index("idx_survey_question_responses_submission_id", "submission_id"),
+        Index(
+            "uq_wv_survey_question_responses_submission_id",
+            "submission_id",
+            unique=True,
+            postgresql_where=text("is_deleted = false"),
+        ),
         Index("idx_survey_question_responses_created_by_id", "created_by_id"),
         Index("idx_survey_question_responses_last_updated_by_id", "last_updated_by_id"),
         {"schema": SCHEMA},
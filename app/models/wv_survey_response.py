@@ -1,4 +1,4 @@
-from sqlalchemy import Column, String, ForeignKey, Index, Date, Text
+from sqlalchemy import Column, String, ForeignKey, Index, Date, Text, text
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.orm import relationship
 from .base import Base
@@ -15,7 +15,12 @@ class WVSurveyResponse(Base, SoftDeleteMixin, TimestampMixin, UUIDMixin, AuditMi
     __table_args__ = (
         Index("idx_survey_responses_form_visit_id", "form_visit_id"),
         Index("idx_survey_responses_survey_type", "survey_type"),
-        Index("idx_survey_responses_submission_id", "submission_id"),
+        Index(
+            "uq_wv_survey_responses_submission_id",
+            "submission_id",
+            unique=True,
+            postgresql_where=text("is_deleted = false"),
+        ),
         Index("idx_survey_responses_created_by_id", "created_by_id"),
         Index("idx_survey_responses_last_updated_by_id", "last_updated_by_id"),
         {"schema": SCHEMA},
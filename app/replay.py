@@ -0,0 +1,319 @@
+"""Offline replay of payload dumps through the job orchestrators.
+
+Reads JSONL/NDJSON dumps (optionally gzipped) of raw payloads, Firestore
+job docs ({"payload", "job_name", ...}) or /get-payload output
+({"id", "data": {...}}), and processes them across a pool of worker
+processes, each with its own database engine. Jobs that fail on a
+reference another job creates are replayed again after the pass, so dumps
+do not need to be in dependency order.
+
+Usage (from the app directory):
+    python replay.py dump.jsonl [more.jsonl.gz ...] --source cc \\
+        --workers 8 --checkpoint replay.checkpoint
+"""
+
+import os
+import sys
+import gzip
+import json
+import time
+import logging
+import argparse
+import multiprocessing
+from core import logger, extract_job_name, MIGRATED_FORM_TYPES
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# Seconds between progress reports
+PROGRESS_INTERVAL_S = 10
+
+
+# -------------------------------------
+# INPUT
+# -------------------------------------
+def _open(path: str):
+    if path.endswith(".gz"):
+        return gzip.open(path, "rt", encoding="utf-8")
+    return open(path, "r", encoding="utf-8")
+
+
+def _iter_records(path: str):
+    """Yield the JSON records of a dump: one per line, or the items of a
+    JSON array / {"records": [...]} document"""
+    with _open(path) as f:
+        first = f.read(1)
+        while first and first.isspace():
+            first = f.read(1)
+
+        if first in ("[", "{") and not _is_ndjson(path):
+            document = json.loads(first + f.read())
+            if isinstance(document, dict) and "records" in document:
+                document = document["records"]
+            yield from (document if isinstance(document, list) else [document])
+            return
+
+        f.seek(0)
+        for line_no, line in enumerate(f, start=1):
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                yield json.loads(line)
+            except json.JSONDecodeError as e:
+                logger.error(
+                    {"message": "Skipping unparseable line", "file": path, "line": line_no, "error": str(e)}
+                )
+
+
+def _is_ndjson(path: str) -> bool:
+    name = path[:-3] if path.endswith(".gz") else path
+    return name.endswith((".jsonl", ".ndjson"))
+
+
+def _to_job(record: dict, source: str):
+    """Normalize a dump record to (job_id, job_name, payload)"""
+    if "data" in record and isinstance(record["data"], dict):
+        record = record["data"]  # /get-payload output
+
+    if "payload" in record and isinstance(record["payload"], dict):
+        payload = record["payload"]  # Firestore job doc
+        job_name = record.get("job_name") or extract_job_name(source, payload)
+    else:
+        payload = record  # Raw payload
+        job_name = extract_job_name(source, payload)
+
+    return payload.get("id"), job_name, payload
+
+
+# -------------------------------------
+# CHECKPOINT
+# -------------------------------------
+def _load_checkpoint(path: str) -> set:
+    if not path or not os.path.exists(path):
+        return set()
+    with open(path, "r", encoding="utf-8") as f:
+        return {line.strip() for line in f if line.strip()}
+
+
+# -------------------------------------
+# WORKERS
+# -------------------------------------
+_user_id = None
+
+
+def _init_worker(user_id: str, quiet: bool):
+    """Give each worker process its own connection pool"""
+    global _user_id
+    from core.postgresql_util import engine
+
+    # Connections inherited from the parent must not be shared across processes
+    engine.dispose(close=False)
+    _user_id = user_id
+    if quiet:
+        logger.setLevel(logging.WARNING)
+
+
+def _replay_job(job):
+    from core import session_scope
+    from jobs.commcare_to_postgresql import JOB_MAPPING
+    from services import UnresolvedReferenceError
+
+    job_id, job_name, payload = job
+    started = time.monotonic()
+    try:
+        with session_scope() as db:
+            result = JOB_MAPPING[job_name](db).process_data(payload, _user_id)
+            record_id = str(result.id)
+        return job_id, job_name, "completed", record_id, time.monotonic() - started
+    except UnresolvedReferenceError as e:
+        return job_id, job_name, "unresolved", str(e), time.monotonic() - started
+    except Exception as e:
+        return job_id, job_name, "failed", str(e), time.monotonic() - started
+
+
+# -------------------------------------
+# REPLAY
+# -------------------------------------
+class Replay:
+    """Runs the passes and keeps the checkpoint, progress and summary"""
+
+    def __init__(self, args):
+        self.args = args
+        self.done = _load_checkpoint(args.checkpoint)
+        self.checkpoint = open(args.checkpoint, "a", encoding="utf-8") if args.checkpoint else None
+        self.errors = open(args.errors, "w", encoding="utf-8") if args.errors else None
+        self.summary = {}
+        self.skipped = {"checkpointed": 0, "unhandled": 0, "duplicate": 0, "invalid": 0}
+        self.processed = 0
+        self.started = time.monotonic()
+        self.last_report = self.started
+
+    def _by_type(self, job_name):
+        return self.summary.setdefault(
+            job_name, {"completed": 0, "failed": 0, "unresolved": 0, "seconds": 0.0}
+        )
+
+    def collect_jobs(self):
+        """Read every dump, dropping checkpointed, unhandled and repeated jobs.
+        A form that appears more than once is replayed in its last version."""
+        from jobs.commcare_to_postgresql import JOB_MAPPING
+
+        job_types = set(self.args.job_type or [])
+        jobs = {}
+        for path in self.args.dumps:
+            for record in _iter_records(path):
+                if not isinstance(record, dict):
+                    self.skipped["invalid"] += 1
+                    continue
+                job_id, job_name, payload = _to_job(record, self.args.source)
+                if not job_id:
+                    self.skipped["invalid"] += 1
+                elif job_id in self.done:
+                    self.skipped["checkpointed"] += 1
+                elif (
+                    job_name not in JOB_MAPPING
+                    or job_name not in MIGRATED_FORM_TYPES
+                    or (job_types and job_name not in job_types)
+                ):
+                    self.skipped["unhandled"] += 1
+                else:
+                    if job_id in jobs:
+                        self.skipped["duplicate"] += 1
+                    jobs[job_id] = (job_id, job_name, payload)
+        return list(jobs.values())
+
+    def _record(self, outcome):
+        job_id, job_name, status, detail, elapsed = outcome
+        by_type = self._by_type(job_name)
+        by_type[status] += 1
+
+        if status == "completed":
+            if self.checkpoint:
+                self.checkpoint.write(job_id + "\n")
+                self.checkpoint.flush()
+        elif self.errors:
+            self.errors.write(
+                json.dumps({"job_id": job_id, "job_name": job_name, "status": status, "error": detail})
+                + "\n"
+            )
+
+    def _report_progress(self):
+        elapsed = time.monotonic() - self.started
+        print(
+            json.dumps(
+                {
+                    "message": "Replay progress",
+                    "processed": self.processed,
+                    "rate_per_s": round(self.processed / elapsed, 1) if elapsed else None,
+                    "completed": sum(t["completed"] for t in self.summary.values()),
+                    "failed": sum(t["failed"] for t in self.summary.values()),
+                    "elapsed_s": round(elapsed, 1),
+                }
+            ),
+            file=sys.stderr,
+            flush=True,
+        )
+
+    def run(self):
+        jobs = self.collect_jobs()
+        print(
+            json.dumps({"message": "Replay starting", "jobs": len(jobs), "skipped": self.skipped}),
+            file=sys.stderr,
+            flush=True,
+        )
+
+        with multiprocessing.Pool(
+            self.args.workers,
+            initializer=_init_worker,
+            initargs=(self.args.user_id, self.args.quiet),
+        ) as pool:
+            for replay_pass in range(1, self.args.passes + 1):
+                final = replay_pass == self.args.passes
+                unresolved = {}
+                for outcome in pool.imap_unordered(
+                    _replay_job, jobs, chunksize=self.args.chunksize
+                ):
+                    self.processed += 1
+                    self._by_type(outcome[1])["seconds"] += outcome[4]
+                    if outcome[2] == "unresolved":
+                        unresolved[outcome[0]] = outcome
+                    else:
+                        self._record(outcome)
+
+                    now = time.monotonic()
+                    if now - self.last_report >= PROGRESS_INTERVAL_S:
+                        self.last_report = now
+                        self._report_progress()
+
+                # Referenced records may have been created later in this pass;
+                # stop once a pass resolves nothing new
+                if final or not unresolved or len(unresolved) == len(jobs):
+                    for outcome in unresolved.values():
+                        self._record(outcome)
+                    break
+                jobs = [job for job in jobs if job[0] in unresolved]
+
+        return self.finish()
+
+    def finish(self):
+        for handle in (self.checkpoint, self.errors):
+            if handle:
+                handle.close()
+
+        for by_type in self.summary.values():
+            by_type["seconds"] = round(by_type["seconds"], 2)
+        summary = {
+            "processed": self.processed,
+            "completed": sum(t["completed"] for t in self.summary.values()),
+            "failed": sum(t["failed"] + t["unresolved"] for t in self.summary.values()),
+            "skipped": self.skipped,
+            "by_job_type": self.summary,
+            "elapsed_s": round(time.monotonic() - self.started, 2),
+        }
+        print(json.dumps(summary, indent=2))
+        return summary
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Replay payload dumps through the job orchestrators"
+    )
+    parser.add_argument("dumps", nargs="+", help="JSONL/NDJSON or JSON dump files (.gz ok)")
+    parser.add_argument("--source", default="cc", help="Payload source (default: cc)")
+    parser.add_argument(
+        "--workers", type=int, default=os.cpu_count() or 1, help="Worker processes"
+    )
+    parser.add_argument(
+        "--chunksize", type=int, default=20, help="Jobs handed to a worker at a time"
+    )
+    parser.add_argument(
+        "--passes",
+        type=int,
+        default=3,
+        help="Passes over jobs failing on a missing reference (default: 3)",
+    )
+    parser.add_argument(
+        "--checkpoint", help="File of completed job IDs; completed jobs are skipped on rerun"
+    )
+    parser.add_argument("--errors", help="Write failed jobs to this JSONL file")
+    parser.add_argument(
+        "--job-type", action="append", help="Only replay this job name (repeatable)"
+    )
+    parser.add_argument(
+        "--user-id",
+        default=os.getenv("SYSTEM_USER_ID_TEST"),
+        help="User ID recorded as creator (default: SYSTEM_USER_ID_TEST)",
+    )
+    parser.add_argument("--quiet", action="store_true", help="Only log warnings from jobs")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    summary = Replay(args).run()
+    return 0 if summary["failed"] == 0 else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -7,11 +7,16 @@ from .image import ImageService
 from .observation_result import ObservationResultService
 from .observation import ObservationService
 from .resolvers import ForeignKeyResolver
+from .reference_cache import reference_cache, invalidate_reference
 from .training_session import TrainingSessionService
 from .farm_visit import FarmVisitService
 from .fv_best_practice import FVBestPracticeService
 from .fv_best_practice_answer import FVBestPracticeAnswerService
 from .skip_transformation import SkipTransformation
+from .unresolved_reference import UnresolvedReferenceError
+from .dependency_tracker import dependency_key, record_provided, provided_refs
+from .upsert import BaseUpsertService
+from .change_detection import unchanged_record
 from .coffee_variety import CoffeeVarietyService
 from .farm import FarmService
 from .check import CheckService
@@ -0,0 +1,43 @@
+"""Skipping payloads that were already processed unchanged.
+
+Parent records keep the hash of the payload they were last written from.
+A resubmission with the same hash has nothing new to write, so the
+orchestrator returns the stored record instead of transforming and
+upserting the whole form again.
+"""
+
+from typing import Optional, Type
+from sqlalchemy.orm import Session
+from core import logger
+from .dependency_tracker import record_stored
+
+
+def unchanged_record(
+    db: Session, model: Type, submission_id: str, digest: str
+) -> Optional[object]:
+    """Active record of `model` last written from a payload hashing to `digest`.
+
+    Its external IDs and those of the records around it are recorded as
+    provided by the session, as if the payload had been written again.
+    """
+    record = (
+        db.query(model)
+        .filter(
+            model.submission_id == submission_id,
+            model.payload_hash == digest,
+            model.is_deleted == False,
+        )
+        .first()
+    )
+    if record is not None:
+        # Release jobs parked on what the skipped writes would have provided
+        record_stored(db, record)
+        logger.info(
+            {
+                "message": f"Skipping unchanged {model.__tablename__} payload",
+                "submission_id": submission_id,
+                "record_id": str(record.id),
+            }
+        )
+    return record
+
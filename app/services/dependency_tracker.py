@@ -0,0 +1,132 @@
+"""Tracks which external IDs a job's writes make resolvable.
+
+A job that references an external ID nobody has created yet is parked with
+the dependency keys it is waiting on. Every session records the keys of the
+rows it writes, so the job runner can release the parked jobs once the job
+that creates those rows commits.
+"""
+
+from typing import Iterable
+from sqlalchemy import event, false, inspect, select
+from sqlalchemy.orm import Session
+from models import (
+    Farm,
+    Farmer,
+    FarmerGroup,
+    FarmVisit,
+    FVBestPractice,
+    Household,
+    Observation,
+    ProjectStaffRole,
+    TrainingSession,
+    User,
+    Wetmill,
+    WetmillVisit,
+    WVSurveyResponse,
+)
+
+# External ID columns that ForeignKeyResolver looks up and that jobs create
+DEPENDENCY_COLUMNS = (
+    Farmer.commcare_case_id,
+    FarmerGroup.commcare_case_id,
+    Household.sf_id,
+    Household.tns_id,
+    TrainingSession.commcare_case_id,
+    ProjectStaffRole.commcare_case_id,
+    Wetmill.commcare_case_id,
+    User.sf_id,
+    Farm.submission_id,
+    FarmVisit.submission_id,
+    FVBestPractice.submission_id,
+    Observation.submission_id,
+    WetmillVisit.submission_id,
+    WVSurveyResponse.submission_id,
+)
+
+_COLUMNS_BY_MODEL = {}
+for _column in DEPENDENCY_COLUMNS:
+    _COLUMNS_BY_MODEL.setdefault(_column.class_, []).append(_column)
+
+_MODELS_BY_TABLE = {model.__table__: model for model in _COLUMNS_BY_MODEL}
+
+_INFO_KEY = "provided_refs"
+
+
+def dependency_key(column: object, external_id: str) -> str:
+    """Key of one external ID, e.g. 'Farmer.commcare_case_id:abc'.
+
+    `column` is the lookup column or its string form, as reported in
+    UnresolvedReferenceError.missing.
+    """
+    return f"{column}:{external_id}"
+
+
+def record_provided(session: Session, column: object, external_ids: Iterable[str]) -> None:
+    """Note external IDs written by `session` outside of the ORM unit of
+    work (e.g. by bulk INSERT statements)"""
+    refs = session.info.setdefault(_INFO_KEY, set())
+    refs.update(dependency_key(column, external_id) for external_id in external_ids if external_id)
+
+
+def record_written(session: Session, model: object, rows: Iterable[dict]) -> None:
+    """Note the external IDs of rows written to `model` by an INSERT
+    statement, given as column -> value dicts"""
+    for column in _COLUMNS_BY_MODEL.get(model, ()):
+        record_provided(session, column, [row.get(column.key) for row in rows])
+
+
+def record_stored(session: Session, record: object) -> None:
+    """Note the external IDs of a stored record, of the records it references
+    and of the active records referencing it.
+
+    Used when a job finds its payload already stored and skips the writes,
+    so it still provides the keys that writing it would have.
+    """
+    model = type(record)
+    table = model.__table__
+    for column in _COLUMNS_BY_MODEL.get(model, ()):
+        record_provided(session, column, [getattr(record, column.key)])
+
+    mapper = inspect(model)
+    parents = set()
+    for fk in table.foreign_keys:
+        parent = _MODELS_BY_TABLE.get(fk.column.table)
+        value = getattr(record, mapper.get_property_by_column(fk.parent).key)
+        if parent is not None and value is not None:
+            parents.add((parent, fk.column, value))
+    for parent, column, value in parents:
+        _record_matching(session, parent, column == value)
+
+    for child_table, child in _MODELS_BY_TABLE.items():
+        for fk in child_table.foreign_keys:
+            if fk.column.table is table:
+                value = getattr(record, mapper.get_property_by_column(fk.column).key)
+                _record_matching(session, child, fk.parent == value)
+
+
+def _record_matching(session: Session, model: object, criterion) -> None:
+    columns = _COLUMNS_BY_MODEL[model]
+    query = select(*columns).where(criterion)
+    if "is_deleted" in model.__table__.c:
+        query = query.where(model.__table__.c.is_deleted == false())
+    rows = session.execute(query).all()
+    for index, column in enumerate(columns):
+        record_provided(session, column, [row[index] for row in rows])
+
+
+def provided_refs(session: Session) -> set:
+    """Dependency keys of the rows written by `session` so far"""
+    return set(session.info.get(_INFO_KEY, ()))
+
+
+@event.listens_for(Session, "after_flush")
+def _track_provided_refs(session, flush_context):
+    for obj in list(session.new) + list(session.dirty):
+        columns = _COLUMNS_BY_MODEL.get(type(obj))
+        if not columns or getattr(obj, "is_deleted", False):
+            continue
+
+        state = inspect(obj)
+        for column in columns:
+            if obj in session.new or state.attrs[column.key].history.has_changes():
+                record_provided(session, column, [getattr(obj, column.key)])
@@ -0,0 +1,61 @@
+"""Process-wide cache of resolved IDs for slowly changing reference tables"""
+
+import os
+from typing import Type
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+from core import TTLCache
+from models import User, FarmerGroup, TrainingSession, ProjectStaffRole, Wetmill
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# Tables that are looked up by nearly every payload but rarely change
+REFERENCE_MODELS = (User, FarmerGroup, TrainingSession, ProjectStaffRole, Wetmill)
+
+reference_cache = TTLCache(
+    maxsize=int(os.getenv("REFERENCE_CACHE_SIZE", "10000")),
+    ttl=float(os.getenv("REFERENCE_CACHE_TTL_S", "300")),
+)
+
+
+def is_reference_model(model: Type) -> bool:
+    return model in REFERENCE_MODELS
+
+
+def reference_key(id_column: object, external_id: str) -> tuple:
+    """Cache key for a record looked up by `id_column == external_id`"""
+    return (id_column.class_.__tablename__, id_column.key, external_id)
+
+
+_INFO_KEY = "invalidate_references"
+
+
+def invalidate_reference(
+    model: Type, external_id: str = None, session: Session = None
+) -> int:
+    """Drop cached lookups of `model`, optionally only for one external ID.
+
+    Services call this when they write a reference table, so the next
+    lookup reads the new row instead of waiting for the TTL to expire.
+    Pass the writing `session` to drop them again once it commits: until
+    then other workers still read the old row and may cache it again.
+    """
+    if session is not None:
+        session.info.setdefault(_INFO_KEY, set()).add((model, external_id))
+
+    table = model.__tablename__
+    return reference_cache.invalidate_where(
+        lambda key: key[0] == table and (external_id is None or key[2] == external_id)
+    )
+
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_committed(session):
+    for model, external_id in session.info.pop(_INFO_KEY, ()):
+        invalidate_reference(model, external_id)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_pending(session):
+    session.info.pop(_INFO_KEY, None)
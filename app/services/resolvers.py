@@ -1,23 +1,162 @@
-from typing import Dict, Type, Any
+from collections import namedtuple
+from threading import Lock
+from typing import Dict, Type, Any, Iterable, Tuple
 from sqlalchemy.orm import Session
-from core import logger
+from core import logger, stage
+from models import Farmer, ProjectStaffRole, Wetmill
+from .unresolved_reference import UnresolvedReferenceError
+from .reference_cache import (
+    reference_cache,
+    reference_key,
+    is_reference_model,
+)
+
+# External IDs per IN (...) query when prefetching
+PREFETCH_CHUNK_SIZE = 500
+
+# Columns callers read from a resolved record. Every lookup selects only
+# these instead of the whole row; models not listed only expose `id`.
+DEFAULT_RESOLVED_COLUMNS = ("id",)
+RESOLVED_COLUMNS = {
+    Farmer: ("id", "household_id"),
+    ProjectStaffRole: ("id", "staff_id"),
+    Wetmill: ("id", "user_id"),
+}
+
+_record_types: Dict[Tuple[Type, Tuple[str, ...]], type] = {}
+_record_types_lock = Lock()
+
+
+def resolved_columns(model: Type) -> Tuple[str, ...]:
+    return RESOLVED_COLUMNS.get(model, DEFAULT_RESOLVED_COLUMNS)
+
+
+def record_type(model: Type, columns: Tuple[str, ...]) -> type:
+    """Immutable record class (a namedtuple, so no per-instance dict)
+    holding the projected columns of `model`"""
+    key = (model, columns)
+    record_cls = _record_types.get(key)
+    if record_cls is None:
+        with _record_types_lock:
+            record_cls = _record_types.setdefault(
+                key, namedtuple(f"{model.__name__}Ref", columns)
+            )
+    return record_cls
 
 
 class ForeignKeyResolver:
-    """Handles resolution of external IDs to internal database records"""
+    """Handles resolution of external IDs to internal database records.
+
+    Lookups select only the columns listed in RESOLVED_COLUMNS and return
+    them as small immutable records rather than session-bound ORM
+    instances, so they are safe to keep after the session closes and to
+    share between threads. Lookups of reference tables (users, farmer
+    groups, training sessions, ...) also go through the process-wide
+    reference cache, so they are shared across jobs.
+    """
 
     def __init__(self, db: Session):
         self.db = db
-        self.cache: Dict[str, Any] = {}  # Cache model instances
+        self.cache: Dict[str, Any] = {}  # Cache resolved records
+
+    @staticmethod
+    def _cache_key(id_column: object, external_id: str) -> str:
+        # Keyed by column, not field label, so "Primary Farmer" and
+        # "Farmer" lookups of the same case ID share one entry
+        return f"{id_column}:{external_id}"
 
+    @staticmethod
+    def _projection(model: Type, id_column: object) -> list:
+        """Columns to select: the resolved columns plus the lookup column"""
+        return [getattr(model, column) for column in resolved_columns(model)] + [
+            id_column
+        ]
+
+    @staticmethod
+    def _to_record(model: Type, row) -> Any:
+        """Build the compact record from a projected row"""
+        columns = resolved_columns(model)
+        return record_type(model, columns)(*row[: len(columns)])
+
+    def _cache_record(self, model: Type, id_column: object, external_id: str, record) -> Any:
+        """Store a resolved record in the local and, if applicable, shared cache"""
+        if is_reference_model(model):
+            reference_cache.set(reference_key(id_column, external_id), record)
+        self.cache[self._cache_key(id_column, external_id)] = record
+        return record
+
+    def _cached_reference(self, model: Type, id_column: object, external_id: str) -> Any:
+        """Look up the shared cache, copying hits into the local cache"""
+        if not is_reference_model(model):
+            return None
+        record = reference_cache.get(reference_key(id_column, external_id))
+        if record is not None:
+            self.cache[self._cache_key(id_column, external_id)] = record
+        return record
+
+    @stage("resolve")
+    def prefetch(self, lookups: Iterable[Tuple[Type, object, Iterable[str]]]) -> None:
+        """Resolve sets of external IDs up front, one IN (...) query per set.
+
+        Each lookup is a (model, id_column, external_ids) tuple. Resolved
+        records land in the cache so later resolve_db_id calls are free. All
+        IDs without a record are reported together in one
+        UnresolvedReferenceError.
+        """
+        missing = []
+
+        for model, id_column, external_ids in lookups:
+            pending = sorted(
+                {
+                    external_id
+                    for external_id in external_ids
+                    if external_id
+                    and self._cache_key(id_column, external_id) not in self.cache
+                    and self._cached_reference(model, id_column, external_id) is None
+                }
+            )
+
+            for start in range(0, len(pending), PREFETCH_CHUNK_SIZE):
+                chunk = pending[start : start + PREFETCH_CHUNK_SIZE]
+                rows = (
+                    self.db.query(*self._projection(model, id_column))
+                    .filter(id_column.in_(chunk), model.is_deleted == False)
+                    .all()
+                )
+                for row in rows:
+                    external_id = row[-1]
+                    if self._cache_key(id_column, external_id) not in self.cache:
+                        self._cache_record(
+                            model, id_column, external_id, self._to_record(model, row)
+                        )
+
+            missing.extend(
+                (str(id_column), external_id)
+                for external_id in pending
+                if self._cache_key(id_column, external_id) not in self.cache
+            )
+
+            logger.info(
+                {
+                    "message": f"Prefetched {len(pending)} external IDs for '{id_column}'",
+                }
+            )
+
+        if missing:
+            logger.error(
+                {"message": "Unresolved external IDs", "missing": [f"{c}={e}" for c, e in missing]}
+            )
+            raise UnresolvedReferenceError(missing)
+
+    @stage("resolve")
     def resolve_db_id(
         self, external_id: str, id_column: object, field: str, model: Type
     ) -> Any:
-        """Resolve external ID to an existing DB model instance"""
+        """Resolve external ID to a record of the existing row's resolved columns"""
         if not external_id:
             raise ValueError(f"Missing external ID for '{field}'")
 
-        cache_key = f"{field}:{external_id}"
+        cache_key = self._cache_key(id_column, external_id)
         if cache_key in self.cache:
             logger.info(
                 {
@@ -26,24 +165,34 @@ class ForeignKeyResolver:
             )
             return self.cache[cache_key]
 
+        cached_reference = self._cached_reference(model, id_column, external_id)
+        if cached_reference is not None:
+            logger.info(
+                {
+                    "message": f"Shared cached record for '{field}' with external ID '{external_id}'"
+                }
+            )
+            return cached_reference
+
         try:
-            existing_record = (
-                self.db.query(model)
+            row = (
+                self.db.query(*self._projection(model, id_column))
                 .filter(id_column == external_id, model.is_deleted == False)
                 .first()
             )
 
-            if existing_record:
-                self.cache[cache_key] = existing_record
+            if row:
+                existing_record = self._to_record(model, row)
                 logger.info(
                     {
                         "message": f"Resolved {field}: external_id={external_id}, internal_id={existing_record.id}"
                     }
                 )
-                return existing_record
+                return self._cache_record(model, id_column, external_id, existing_record)
 
-            raise ValueError(
-                f"No record found for '{field}' with external ID '{external_id}'"
+            raise UnresolvedReferenceError(
+                [(str(id_column), external_id)],
+                f"No record found for '{field}' with external ID '{external_id}'",
             )
 
         except Exception as e:
@@ -0,0 +1,12 @@
+class UnresolvedReferenceError(ValueError):
+    """Raised when external IDs referenced by a payload have no DB record."""
+
+    def __init__(self, missing: list, message: str = None):
+        # missing: (column, external_id) pairs, e.g. ("Farmer.commcare_case_id", "abc")
+        self.missing = missing
+        if message is None:
+            details = ", ".join(
+                f"{column}='{external_id}'" for column, external_id in missing
+            )
+            message = f"No record found for {details}"
+        super().__init__(message)
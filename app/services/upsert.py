@@ -0,0 +1,311 @@
+"""Table-driven upserts keyed on a unique external ID.
+
+Every service writes its model the same way: rows are matched on a unique
+external ID (the conflict column), "core" fields are always overwritten,
+other columns keep their current value when the new one is None, and
+`created_by_id` is only set on insert. BaseUpsertService implements that
+once on top of INSERT ... ON CONFLICT so a batch of any size costs one
+statement per chunk, and rows whose values would not change are not
+updated at all.
+
+Soft-deleted rows are never written to or returned. Where the external ID
+is unique across all rows, a row matching a soft-deleted one raises
+ValueError instead of reviving or updating the deleted record.
+"""
+
+from typing import Iterable, List, Type
+from uuid import UUID
+from sqlalchemy import and_, false, func, or_, select, update
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.orm import Session
+from core import logger, stage
+from .dependency_tracker import record_written
+
+# Postgres accepts at most 65535 bind parameters per statement
+MAX_BIND_PARAMS = 32000
+# Rows per INSERT statement and keys per IN (...) lookup
+UPSERT_CHUNK_SIZE = 1000
+
+# Written on every change, but never a reason to update a row by themselves
+_AUDIT_FIELDS = ("created_by_id", "last_updated_by_id")
+
+
+def active_rows(model: Type):
+    """Predicate of the partial unique indexes on soft-deletable tables"""
+    return model.__table__.c.is_deleted == false()
+
+
+def upsert_rows(
+    db: Session,
+    model: Type,
+    rows: Iterable[dict],
+    conflict_column: str = "submission_id",
+    core_fields: Iterable[str] = (),
+    index_where=None,
+) -> List[object]:
+    """Insert `rows` into `model`'s table, updating the rows that already
+    exist for the same `conflict_column` value.
+
+    `core_fields` and the conflict column are always overwritten, other
+    columns keep their current value when the new one is None, and
+    `created_by_id` is left untouched. Existing rows are only updated when
+    a value actually changes. `index_where` is the predicate of a partial
+    unique index to upsert against. Returns one ORM object per input row,
+    in input order; rows sharing a key share the object written from the
+    last of them. Raises ValueError for rows matching a soft-deleted row.
+    """
+    rows = list(rows)
+    by_key = _by_key(rows, conflict_column)
+
+    written = {}
+    for group in _uniform_groups(by_key.values()):
+        chunk_size = _chunk_size(group[0])
+        for start in range(0, len(group), chunk_size):
+            stmt = _upsert_statement(
+                model,
+                group[start : start + chunk_size],
+                conflict_column,
+                set(core_fields),
+                index_where,
+            )
+            for record in db.scalars(
+                stmt, execution_options={"populate_existing": True}
+            ):
+                written[getattr(record, conflict_column)] = record
+
+    # Unchanged rows are not returned by the upsert
+    unchanged = [key for key in by_key if key not in written]
+    written.update(_load(db, model, conflict_column, unchanged))
+
+    # Neither inserted, updated nor active: they match a soft-deleted row
+    deleted = [key for key in by_key if key not in written]
+    if deleted:
+        logger.error(
+            {
+                "message": f"Refusing to write soft-deleted {model.__tablename__} rows",
+                conflict_column: deleted[:10],
+            }
+        )
+        raise ValueError(
+            f"{model.__tablename__} rows are soft-deleted for {conflict_column}: "
+            f"{', '.join(map(str, deleted))}"
+        )
+
+    record_written(db, model, by_key.values())
+    return [written[row[conflict_column]] for row in rows]
+
+
+def update_rows(
+    db: Session,
+    model: Type,
+    rows: Iterable[dict],
+    conflict_column: str,
+    core_fields: Iterable[str] = (),
+) -> dict:
+    """Update the active rows matching `rows` on `conflict_column`, with the
+    same merge as upsert_rows, without inserting missing ones.
+
+    Returns {conflict value: ORM object} for the rows that exist.
+    """
+    by_key = _by_key(rows, conflict_column)
+    table = model.__table__
+    core_fields = set(core_fields)
+
+    written = {}
+    for key, row in by_key.items():
+        values = {
+            field: value
+            for field, value in row.items()
+            if field != "created_by_id" and (field in core_fields or value is not None)
+        }
+        stmt = (
+            update(model)
+            .where(table.c[conflict_column] == key, active_rows(model))
+            .where(
+                _changed(
+                    (table.c[field], value)
+                    for field, value in values.items()
+                    if field not in _AUDIT_FIELDS
+                )
+            )
+            .values(**values, updated_at=func.now())
+            .returning(model)
+        )
+        for record in db.scalars(
+            stmt,
+            execution_options={"populate_existing": True, "synchronize_session": False},
+        ):
+            written[key] = record
+
+    unchanged = [key for key in by_key if key not in written]
+    written.update(_load(db, model, conflict_column, unchanged))
+
+    record_written(db, model, [by_key[key] for key in written])
+    return written
+
+
+def _by_key(rows: Iterable[dict], conflict_column: str) -> dict:
+    # A statement can't update the same row twice: last row wins
+    by_key = {}
+    for row in rows:
+        by_key[row[conflict_column]] = row
+    return by_key
+
+
+def _uniform_groups(rows: Iterable[dict]) -> List[list]:
+    # A multi-row VALUES needs the same columns in every row
+    groups = {}
+    for row in rows:
+        groups.setdefault(tuple(sorted(row)), []).append(row)
+    return list(groups.values())
+
+
+def _chunk_size(row: dict) -> int:
+    return max(1, min(UPSERT_CHUNK_SIZE, MAX_BIND_PARAMS // len(row)))
+
+
+def _changed(pairs) -> object:
+    """SQL condition true when any column differs from its new value"""
+    conditions = [column.is_distinct_from(value) for column, value in pairs]
+    return or_(*conditions) if conditions else false()
+
+
+def _upsert_statement(model, rows, conflict_column, core_fields, index_where):
+    table = model.__table__
+    stmt = insert(model).values(rows)
+
+    update_columns = {}
+    for field in rows[0]:
+        if field == "created_by_id":
+            continue
+        if field in core_fields or field in [conflict_column, "last_updated_by_id"]:
+            # Always update core fields
+            update_columns[field] = stmt.excluded[field]
+        else:
+            # Smart update: don't overwrite existing data with None values
+            update_columns[field] = func.coalesce(stmt.excluded[field], table.c[field])
+
+    changed = _changed(
+        (table.c[field], value)
+        for field, value in update_columns.items()
+        if field not in _AUDIT_FIELDS
+    )
+    if _soft_deletable(model):
+        # Leave a conflicting soft-deleted row as it is
+        changed = and_(active_rows(model), changed)
+    update_columns["updated_at"] = func.now()
+
+    return stmt.on_conflict_do_update(
+        index_elements=[table.c[conflict_column]],
+        index_where=index_where,
+        set_=update_columns,
+        where=changed,
+    ).returning(model)
+
+
+def _soft_deletable(model) -> bool:
+    return "is_deleted" in model.__table__.c
+
+
+def _load(db, model, conflict_column, keys) -> dict:
+    """Load active rows by conflict value"""
+    column = model.__table__.c[conflict_column]
+    loaded = {}
+    for start in range(0, len(keys), UPSERT_CHUNK_SIZE):
+        query = select(model).where(column.in_(keys[start : start + UPSERT_CHUNK_SIZE]))
+        if _soft_deletable(model):
+            query = query.where(active_rows(model))
+        for record in db.scalars(query):
+            loaded[getattr(record, conflict_column)] = record
+    return loaded
+
+
+class BaseUpsertService:
+    """Upserts of one model, configured by class attributes.
+
+    - model: the ORM model written
+    - conflict_column: unique external ID rows are matched on
+    - core_fields: fields always overwritten, even with None
+    - partial_index: the conflict column is unique among active rows only
+      (a partial unique index WHERE is_deleted = false)
+    - insert_missing: False to only update existing rows, raising
+      ValueError for missing ones
+    - label: record name used in log messages
+    - stage_name: timing stage the writes are recorded under
+    """
+
+    model: Type = None
+    conflict_column: str = "submission_id"
+    core_fields: Iterable[str] = ()
+    partial_index: bool = False
+    insert_missing: bool = True
+    label: str = "record"
+    stage_name: str = "upsert"
+
+    def __init__(self, db: Session):
+        self.db = db
+
+    def upsert(self, data, created_by_id: str):
+        """Create or update one record"""
+        return self.upsert_many([data], created_by_id)[0]
+
+    def bulk_upsert(self, data: Iterable, created_by_id: str) -> List[UUID]:
+        """Create or update a batch of records, returning one ID per item in
+        input order"""
+        return [record.id for record in self.upsert_many(data, created_by_id)]
+
+    def upsert_many(self, data: Iterable, created_by_id: str) -> List[object]:
+        """Create or update a batch of records, returning one per item in
+        input order. Items with the same conflict key are written once, from
+        the last of them, and share the returned record."""
+        rows = [self._row(item, created_by_id) for item in data]
+        if not rows:
+            return []
+
+        with stage(self.stage_name):
+            if self.insert_missing:
+                records = upsert_rows(
+                    self.db,
+                    self.model,
+                    rows,
+                    self.conflict_column,
+                    self.core_fields,
+                    active_rows(self.model) if self.partial_index else None,
+                )
+            else:
+                records = self._update_existing(rows)
+            self._after_upsert(records)
+
+        logger.info(
+            {
+                "message": f"Upserted {len(records)} {self.label} record(s)",
+                self.conflict_column: [
+                    getattr(record, self.conflict_column) for record in records[:10]
+                ],
+            }
+        )
+        return records
+
+    def _update_existing(self, rows: List[dict]) -> List[object]:
+        written = update_rows(
+            self.db, self.model, rows, self.conflict_column, self.core_fields
+        )
+        keys = [row[self.conflict_column] for row in rows]
+        missing = list(dict.fromkeys(key for key in keys if key not in written))
+        if missing:
+            logger.error({"message": f"{self.label.capitalize()} not found: {missing}"})
+            raise ValueError(
+                f"{self.label.capitalize()} not found for {self.conflict_column}: "
+                f"{', '.join(map(str, missing))}"
+            )
+        return [written[key] for key in keys]
+
+    def _row(self, data, created_by_id: str) -> dict:
+        return {
+            **data.model_dump(exclude_unset=True),
+            "created_by_id": created_by_id,
+            "last_updated_by_id": created_by_id,
+        }
+
+    def _after_upsert(self, records: List[object]) -> None:
+        """Hook run after every write, e.g. to invalidate caches"""
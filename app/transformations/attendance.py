@@ -3,7 +3,7 @@ from schemas import AttendanceCreate
 from services import ForeignKeyResolver, SkipTransformation
 from models import TrainingSession, Farmer
 from pydantic import ValidationError
-from core import logger
+from core import logger, stage
 
 
 class AttendanceTransformer:
@@ -12,6 +12,7 @@ class AttendanceTransformer:
     def __init__(self, resolver: ForeignKeyResolver):
         self.resolver = resolver
 
+    @stage("transform")
     def transform(
         self, payload: Dict, farmer_external_id, id_column
     ) -> AttendanceCreate:
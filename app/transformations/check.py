@@ -5,7 +5,7 @@ from schemas import CheckCreate
 from models import FarmVisit, Observation, User, Farmer, TrainingSession
 from services import ForeignKeyResolver
 from pydantic import ValidationError
-from core import logger
+from core import logger, stage
 
 
 class CheckTransformer:
@@ -14,6 +14,7 @@ class CheckTransformer:
     def __init__(self, resolver: ForeignKeyResolver):
         self.resolver = resolver
 
+    @stage("check")
     def transform(
         self, raw_payload: Dict, cleaned_payload: Dict, check_type: str
     ) -> CheckCreate:
@@ -5,7 +5,7 @@ from schemas import CoffeeVarietyCreate
 from models import Farm
 from services import ForeignKeyResolver
 from pydantic import ValidationError
-from core import logger
+from core import logger, stage
 
 
 class CoffeeVarietyTransformer:
@@ -14,6 +14,7 @@ class CoffeeVarietyTransformer:
     def __init__(self, resolver: ForeignKeyResolver):
         self.resolver = resolver
 
+    @stage("transform")
     def transform(self, cleaned_payload: Dict) -> CoffeeVarietyCreate:
         """Transform CommCare payload to CoffeeVarietyCreate schema"""
 
@@ -6,7 +6,7 @@ from schemas import FarmCreate
 from models import Household, FarmVisit
 from services import ForeignKeyResolver
 from pydantic import ValidationError
-from core import logger
+from core import logger, stage
 
 
 class FarmTransformer:
@@ -15,6 +15,7 @@ class FarmTransformer:
     def __init__(self, resolver: ForeignKeyResolver):
         self.resolver = resolver
 
+    @stage("transform")
     def transform(self, raw_payload: Dict, cleaned_payload: Dict) -> FarmCreate:
         """Transform CommCare payload to FarmCreate schema"""
 
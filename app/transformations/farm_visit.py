@@ -5,7 +5,7 @@ from schemas import FarmVisitCreate
 from models import Household, Farmer, TrainingSession, User
 from services import ForeignKeyResolver
 from pydantic import ValidationError
-from core import logger
+from core import logger, stage
 
 
 class FarmVisitTransformer:
@@ -14,6 +14,12 @@ class FarmVisitTransformer:
     def __init__(self, resolver: ForeignKeyResolver):
         self.resolver = resolver
 
+    @staticmethod
+    def submission_id(payload: Dict) -> str:
+        """Submission ID of the farm visit recorded from a payload"""
+        return f"FV-{payload.get('id')}"
+
+    @stage("transform")
     def transform(self, payload: Dict) -> FarmVisitCreate:
         """Transform CommCare payload to FarmVisitCreate schema"""
 
@@ -23,6 +29,8 @@ class FarmVisitTransformer:
             survey_detail = payload.get("form", {}).get("@name")
             new_farmer = payload.get("form", {}).get("new_farmer", "") == "1"
 
+            self._prefetch_references(payload, survey_detail, new_farmer)
+
             # Resolve foreign keys first
             visiting_staff_id = self.resolver.resolve_db_id(
                 payload.get("form", {}).get("trainer"),
@@ -166,11 +174,37 @@ class FarmVisitTransformer:
             )
             raise ValueError(f"Schema validation failed: {str(e.errors())}") from e
 
+    def _prefetch_references(
+        self, payload: Dict, survey_detail: str, new_farmer: bool
+    ) -> None:
+        """Resolve the visit's staff, session and farmers in one batch"""
+        form = payload.get("form", {})
+
+        if survey_detail == "Farm Visit Full" and not new_farmer:
+            farmers = [form.get("farm_being_visted", ""), form.get("secondary_farmer")]
+        elif survey_detail == "Farm Visit - AA":
+            farmers = (form.get("farm_being_visted", "") or "").split(" ")[:2]
+        else:
+            # New farmers are created by this same job, nothing to batch
+            return
+
+        self.resolver.prefetch(
+            [
+                (User, User.sf_id, [form.get("trainer")]),
+                (
+                    TrainingSession,
+                    TrainingSession.commcare_case_id,
+                    [form.get("training_session")],
+                ),
+                (Farmer, Farmer.commcare_case_id, farmers),
+            ]
+        )
+
     def _map_farm_visit_full(self, payload: Dict) -> Dict[str, Any]:
         """Map data for Farm Visit Full for FT submissions"""
 
         return {
-            "submission_id": f"FV-{payload.get("id")}",
+            "submission_id": self.submission_id(payload),
             "date_visited": payload.get("form", {}).get("date_of_visit", ""),
             "farm_visit_type": payload.get("form", {}).get("survey_type", ""),
             "visit_comments": payload.get("form", {}).get("farm_visit_comments", ""),
@@ -3,7 +3,7 @@ from schemas import FarmerCreate
 from services import ForeignKeyResolver, SkipTransformation
 from models import FarmerGroup, Household
 from pydantic import ValidationError
-from core import logger
+from core import logger, stage
 
 
 class FarmerTransformer:
@@ -12,6 +12,7 @@ class FarmerTransformer:
     def __init__(self, resolver: ForeignKeyResolver):
         self.resolver = resolver
 
+    @stage("transform")
     def transform(self, payload: Dict) -> FarmerCreate:
         """Transform CommCare payload to FarmerCreate schema"""
 
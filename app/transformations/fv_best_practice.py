@@ -5,7 +5,7 @@ from schemas import FVBestPracticeCreate
 from services import ForeignKeyResolver
 from models import FarmVisit
 from pydantic import ValidationError
-from core import logger, FV_BP_TYPE
+from core import logger, FV_BP_TYPE, stage
 
 
 class FVBestPracticeTransformer:
@@ -14,6 +14,7 @@ class FVBestPracticeTransformer:
     def __init__(self, resolver: ForeignKeyResolver):
         self.resolver = resolver
 
+    @stage("transform")
     def transform(self, payload: Dict, bp: str) -> FVBestPracticeCreate:
         """Transform CommCare payload to FVBestPracticeCreate schema"""
 
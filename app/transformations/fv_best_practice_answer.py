@@ -3,6 +3,7 @@ from schemas import FVBestPracticeAnswerCreate
 from models import FVBestPractice
 from services import ForeignKeyResolver
 from core import (
+    stage,
     logger,
     FV_BP_MAPPINGS,
     FV_BP_VISIT_TYPE_FILTER,
@@ -20,6 +21,7 @@ class FVBestPracticeAnswerTransformer:
     def __init__(self, resolver: ForeignKeyResolver):
         self.resolver = resolver
 
+    @stage("transform")
     def transform(
         self,
         payload: Dict,
@@ -3,7 +3,7 @@ from schemas import HouseholdCreate
 from services import ForeignKeyResolver, SkipTransformation
 from models import FarmerGroup
 from pydantic import ValidationError
-from core.logging_util import logger
+from core import logger, stage
 
 class HouseholdTransformer:
     """Transforms CommCare payload to database-ready schema"""
@@ -11,6 +11,7 @@ class HouseholdTransformer:
     def __init__(self, resolver: ForeignKeyResolver):
         self.resolver = resolver
 
+    @stage("transform")
     def transform(self, payload: Dict) -> HouseholdCreate:
         """Transform CommCare payload to HouseholdCreate schema"""
 
@@ -1,7 +1,7 @@
 from typing import Dict, Any
 from schemas import ImageCreate
 from pydantic import ValidationError
-from core.logging_util import logger
+from core import logger, stage
 
 
 class ImageTransformer:
@@ -10,6 +10,7 @@ class ImageTransformer:
     def __init__(self):
         pass
 
+    @stage("image")
     def transform(
         self, payload: dict, image_url: str, image_reference_obj: object, image_description: str
     ) -> ImageCreate:
@@ -2,7 +2,7 @@ from typing import Dict, Any
 from schemas import ObservationCreate
 from services import ForeignKeyResolver
 from models import User, FarmerGroup, TrainingSession
-from core import logger
+from core import logger, stage
 from pydantic import ValidationError
 
 
@@ -12,6 +12,7 @@ class ObservationTransformer:
     def __init__(self, resolver: ForeignKeyResolver):
         self.resolver = resolver
 
+    @stage("transform")
     def transform(self, payload: Dict) -> ObservationCreate:
         """Transform CommCare payload to ObservationCreate schema"""
         try:
@@ -2,7 +2,7 @@ from typing import Dict, Any
 from schemas import ObservationResultCreate
 from models import Observation
 from services import ForeignKeyResolver
-from core import logger
+from core import logger, stage
 from pydantic import ValidationError
 
 
@@ -12,6 +12,7 @@ class ObservationResultTransformer:
     def __init__(self, resolver: ForeignKeyResolver):
         self.resolver = resolver
 
+    @stage("transform")
     def transform(self, raw_payload: Dict, cleaned_payload: Dict) -> ObservationResultCreate:
         """Transform CommCare payload to ObservationResultCreate schema"""
         try:
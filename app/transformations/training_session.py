@@ -2,7 +2,7 @@ from typing import Dict, Any
 from schemas import TrainingSessionCreate
 from services import ForeignKeyResolver
 from models import User
-from core.logging_util import logger
+from core import logger, stage
 from pydantic import ValidationError
 
 
@@ -12,6 +12,7 @@ class TrainingSessionTransformer:
     def __init__(self, resolver: ForeignKeyResolver):
         self.resolver = resolver
 
+    @stage("transform")
     def transform(self, payload: Dict) -> TrainingSessionCreate:
         """Transform CommCare payload to TrainingSessionCreate schema"""
         try:
@@ -1,4 +1,5 @@
 from core import (
+    stage,
     logger,
     map_status, map_mill_status, map_manager_role, EXPORTING_STATUS_MAP, MANAGER_ROLE_MAP, WET_MILL_STATUS_MAP, VERTICAL_INTEGRATION_MAP
 )
@@ -14,6 +15,7 @@ class WetmillTransformer:
     def __init__(self, resolver: ForeignKeyResolver):
         self.resolver = resolver
 
+    @stage("transform")
     def transform(self, payload: dict) -> WetmillCreate:
         """Transform CommCare payload to WetmillCreate schema"""
         form = payload.get("form", {})
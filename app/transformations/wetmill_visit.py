@@ -1,4 +1,4 @@
-from core import logger
+from core import logger, stage
 from schemas import WetmillVisitCreate
 from models import Wetmill
 from services import ForeignKeyResolver
@@ -12,6 +12,12 @@ class WetmillVisitTransformer:
     def __init__(self, resolver: ForeignKeyResolver):
         self.resolver = resolver
 
+    @staticmethod
+    def submission_id(payload: dict) -> str:
+        """Submission ID of the wetmill visit recorded from a payload"""
+        return f"WV-{payload.get('id')}"
+
+    @stage("transform")
     def transform(self, payload: dict) -> WetmillVisitCreate:
         """Transform CommCare payload to TrainingSessionCreate schema"""
         form = payload.get("form", {})
@@ -53,7 +59,6 @@ class WetmillVisitTransformer:
             else None
         )
         form_name = form.get("survey_type")
-        form_id = payload.get("id")
         loc_str = form.get("introduction", {}).get("gps", "")
         point = self.extract_location_string(loc_str)
         entrance_photograph = (
@@ -66,7 +71,7 @@ class WetmillVisitTransformer:
             .get("url", "")
         )
         return {
-            "submission_id": f"WV-{form_id}",
+            "submission_id": self.submission_id(payload),
             "form_name": form_name,
             "visit_date": visit_date,
             "entrance_photograph": entrance_photograph,
@@ -2,7 +2,7 @@ from typing import Dict, Any
 from schemas import WVSurveyQuestionResponseCreate
 from models import WVSurveyResponse
 from services import ForeignKeyResolver
-from core import logger
+from core import logger, stage
 from pydantic import ValidationError
 import datetime
 from geoalchemy2.shape import from_shape
@@ -14,6 +14,7 @@ class WVSurveyQuestionResponseTransformer:
     def __init__(self, resolver: ForeignKeyResolver):
         self.resolver = resolver
 
+    @stage("transform")
     def transform(
         self,
         payload: dict,
@@ -22,8 +23,13 @@ class WVSurveyQuestionResponseTransformer:
         question_name: str,
         answer,
         submission_id,
+        survey_response_id=None,
     ) -> WVSurveyQuestionResponseCreate:
-        """Transform CommCare payload to WVSurveyQuestionResponseCreate schema"""
+        """Transform CommCare payload to WVSurveyQuestionResponseCreate schema.
+
+        Pass survey_response_id when the parent survey response is already
+        known to skip resolving it again for every answer.
+        """
         try:
 
             session_data = self._map_wv_survey_question_response_data(
@@ -34,12 +40,13 @@ class WVSurveyQuestionResponseTransformer:
             )
 
             # Resolve IDs
-            survey_response_id = self.resolver.resolve_db_id(
-                f"SR-{payload.get("id")}-{survey_type}",
-                WVSurveyResponse.submission_id,
-                "Survey Response",
-                WVSurveyResponse,
-            ).id
+            if survey_response_id is None:
+                survey_response_id = self.resolver.resolve_db_id(
+                    f"SR-{payload.get("id")}-{survey_type}",
+                    WVSurveyResponse.submission_id,
+                    "Survey Response",
+                    WVSurveyResponse,
+                ).id
 
             return WVSurveyQuestionResponseCreate(
                 survey_response_id=survey_response_id, **session_data
@@ -2,7 +2,7 @@ from typing import Dict, Any
 from schemas import WVSurveyResponseCreate
 from models import WetmillVisit
 from services import ForeignKeyResolver
-from core import logger
+from core import logger, stage
 from pydantic import ValidationError
 
 
@@ -12,6 +12,7 @@ class WVSurveyResponseTransformer:
     def __init__(self, resolver: ForeignKeyResolver):
         self.resolver = resolver
 
+    @stage("transform")
     def transform(
         self, payload: Dict, survey_type: str, content: dict
     ) -> WVSurveyResponseCreate:
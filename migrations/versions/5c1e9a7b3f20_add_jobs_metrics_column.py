@@ -0,0 +1,25 @@
+"""add jobs metrics column
+
+Revision ID: 5c1e9a7b3f20
+Revises: d8a37977d4f6
+Create Date: 2026-10-18 14:03:52.118406
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision = '5c1e9a7b3f20'
+down_revision = 'd8a37977d4f6'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column('jobs', sa.Column('metrics', postgresql.JSONB(astext_type=sa.Text()), nullable=True), schema='pima')
+
+
+def downgrade() -> None:
+    op.drop_column('jobs', 'metrics', schema='pima')
@@ -0,0 +1,97 @@
+"""partial unique submission_id indexes
+
+Soft-deletes duplicate active rows per submission_id, keeping the most
+recently updated one, and replaces the plain submission_id indexes with
+unique indexes over the active rows. Rows referencing a removed duplicate
+are pointed at the kept row first. The dedupe is not undone on downgrade.
+
+Revision ID: 7a4d2c9e1b58
+Revises: 5c1e9a7b3f20
+Create Date: 2026-10-18 15:21:07.584213
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '7a4d2c9e1b58'
+down_revision = '5c1e9a7b3f20'
+branch_labels = None
+depends_on = None
+
+SCHEMA = 'pima'
+
+# table, old index, referencing (table, column) pairs. Parents come before
+# their children so re-pointed children are deduped afterwards.
+TABLES = [
+    ('observations', 'idx_observations_submission_id', [
+        ('observation_results', 'observation_id'),
+        ('checks', 'observation_id'),
+        ('images', 'image_reference_id'),
+    ]),
+    ('observation_results', 'idx_observation_results_submission_id', []),
+    ('wetmill_visits', 'idx_wetmill_visits_submission_id', [
+        ('wv_survey_responses', 'form_visit_id'),
+        ('images', 'image_reference_id'),
+    ]),
+    ('wv_survey_responses', 'idx_survey_responses_submission_id', [
+        ('wv_survey_question_responses', 'survey_response_id'),
+    ]),
+    ('wv_survey_question_responses', 'idx_survey_question_responses_submission_id', []),
+    ('images', 'idx_images_submission_id', []),
+]
+
+
+def _ranked(table: str) -> str:
+    """Active rows with the row kept for their submission_id"""
+    return f"""
+        WITH ranked AS (
+            SELECT
+                id,
+                first_value(id) OVER w AS keep_id,
+                row_number() OVER w AS rn
+            FROM {SCHEMA}.{table}
+            WHERE is_deleted = false
+            WINDOW w AS (
+                PARTITION BY submission_id
+                ORDER BY updated_at DESC, created_at DESC, id DESC
+            )
+        )
+    """
+
+
+def _dedupe(table: str, children: list) -> None:
+    for child_table, column in children:
+        op.execute(
+            f"""
+            {_ranked(table)}
+            UPDATE {SCHEMA}.{child_table} AS c
+            SET {column} = ranked.keep_id
+            FROM ranked
+            WHERE c.{column} = ranked.id AND ranked.rn > 1
+            """
+        )
+
+    op.execute(
+        f"""
+        {_ranked(table)}
+        UPDATE {SCHEMA}.{table} AS t
+        SET is_deleted = true, deleted_at = now(), updated_at = now()
+        FROM ranked
+        WHERE t.id = ranked.id AND ranked.rn > 1
+        """
+    )
+
+
+def upgrade() -> None:
+    for table, old_index, children in TABLES:
+        _dedupe(table, children)
+        op.drop_index(old_index, table_name=table, schema=SCHEMA)
+        op.create_index(f'uq_{table}_submission_id', table, ['submission_id'], unique=True, schema=SCHEMA, postgresql_where=sa.text('is_deleted = false'))
+
+
+def downgrade() -> None:
+    for table, old_index, _ in reversed(TABLES):
+        op.drop_index(f'uq_{table}_submission_id', table_name=table, schema=SCHEMA, postgresql_where=sa.text('is_deleted = false'))
+        op.create_index(old_index, table, ['submission_id'], unique=False, schema=SCHEMA)
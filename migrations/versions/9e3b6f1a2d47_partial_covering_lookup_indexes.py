@@ -0,0 +1,91 @@
+"""partial covering lookup indexes
+
+Replaces the single-column indexes on the external IDs the resolver looks
+up with partial indexes over the active rows that include the resolved
+columns, so lookups are index-only scans. Drops the other single-column
+indexes that duplicate a unique constraint on the same column.
+
+Revision ID: 9e3b6f1a2d47
+Revises: 7a4d2c9e1b58
+Create Date: 2026-10-18 16:02:44.930175
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '9e3b6f1a2d47'
+down_revision = '7a4d2c9e1b58'
+branch_labels = None
+depends_on = None
+
+SCHEMA = 'pima'
+
+# Indexes dropped: (index, table, column)
+DROPPED_INDEXES = [
+    ('idx_users_sf_id', 'users', 'sf_id'),
+    ('idx_users_tns_id', 'users', 'tns_id'),
+    ('idx_locations_sf_id', 'locations', 'sf_id'),
+    ('idx_programs_sf_id', 'programs', 'sf_id'),
+    ('idx_wetmills_commcare_case_id', 'wetmills', 'commcare_case_id'),
+    ('idx_projects_project_unique_id', 'projects', 'project_unique_id'),
+    ('idx_farmer_groups_commcare_case_id', 'farmer_groups', 'commcare_case_id'),
+    ('idx_farmer_groups_sf_id', 'farmer_groups', 'sf_id'),
+    ('idx_farmer_groups_tns_id', 'farmer_groups', 'tns_id'),
+    ('idx_project_staff_roles_commcare_case_id', 'project_staff_roles', 'commcare_case_id'),
+    ('idx_project_staff_roles_tns_id', 'project_staff_roles', 'tns_id'),
+    ('idx_training_modules_sf_id', 'training_modules', 'sf_id'),
+    ('idx_households_commcare_case_id', 'households', 'commcare_case_id'),
+    ('idx_households_sf_id', 'households', 'sf_id'),
+    ('idx_households_tns_id', 'households', 'tns_id'),
+    ('idx_training_sessions_commcare_case_id', 'training_sessions', 'commcare_case_id'),
+    ('idx_farmers_commcare_case_id', 'farmers', 'commcare_case_id'),
+    ('idx_farmers_sf_id', 'farmers', 'sf_id'),
+    ('idx_observations_sf_id', 'observations', 'sf_id'),
+    ('idx_attendances_sf_id', 'attendances', 'sf_id'),
+    ('idx_attendances_submission_id', 'attendances', 'submission_id'),
+    ('idx_farm_visits_sf_id', 'farm_visits', 'sf_id'),
+    ('idx_farm_visits_submission_id', 'farm_visits', 'submission_id'),
+    ('idx_observation_results_sf_id', 'observation_results', 'sf_id'),
+    ('idx_checks_sf_id', 'checks', 'sf_id'),
+    ('idx_checks_submission_id', 'checks', 'submission_id'),
+    ('idx_farms_sf_id', 'farms', 'sf_id'),
+    ('idx_farms_submission_id', 'farms', 'submission_id'),
+    ('idx_farms_tns_id', 'farms', 'tns_id'),
+    ('idx_fv_best_practices_sf_id', 'fv_best_practices', 'sf_id'),
+    ('idx_fv_best_practices_submission_id', 'fv_best_practices', 'submission_id'),
+    ('idx_coffee_varieties_sf_id', 'coffee_varieties', 'sf_id'),
+    ('idx_coffee_varieties_submission_id', 'coffee_varieties', 'submission_id'),
+    ('idx_fv_best_practice_answers_sf_id', 'fv_best_practice_answers', 'sf_id'),
+    ('idx_fv_best_practice_answers_submission_id', 'fv_best_practice_answers', 'submission_id'),
+]
+
+# Partial covering indexes created: (table, lookup column, included columns)
+COVERING_INDEXES = [
+    ('farmers', 'commcare_case_id', ['id', 'household_id']),
+    ('farmer_groups', 'commcare_case_id', ['id']),
+    ('households', 'tns_id', ['id']),
+    ('households', 'sf_id', ['id']),
+    ('training_sessions', 'commcare_case_id', ['id']),
+    ('project_staff_roles', 'commcare_case_id', ['id', 'staff_id']),
+    ('wetmills', 'commcare_case_id', ['id', 'user_id']),
+    ('users', 'sf_id', ['id']),
+    ('farms', 'submission_id', ['id']),
+    ('farm_visits', 'submission_id', ['id']),
+    ('fv_best_practices', 'submission_id', ['id']),
+]
+
+
+def upgrade() -> None:
+    for table, column, include in COVERING_INDEXES:
+        op.create_index(f'idx_{table}_{column}_active', table, [column], unique=False, schema=SCHEMA, postgresql_include=include, postgresql_where=sa.text('is_deleted = false'))
+    for index, table, _ in DROPPED_INDEXES:
+        op.drop_index(index, table_name=table, schema=SCHEMA)
+
+
+def downgrade() -> None:
+    for index, table, column in reversed(DROPPED_INDEXES):
+        op.create_index(index, table, [column], unique=False, schema=SCHEMA)
+    for table, column, _ in reversed(COVERING_INDEXES):
+        op.drop_index(f'idx_{table}_{column}_active', table_name=table, schema=SCHEMA)
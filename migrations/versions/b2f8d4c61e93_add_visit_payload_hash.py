@@ -0,0 +1,26 @@
+"""add visit payload hash
+
+Revision ID: b2f8d4c61e93
+Revises: 9e3b6f1a2d47
+Create Date: 2026-10-18 16:48:19.207731
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b2f8d4c61e93'
+down_revision = '9e3b6f1a2d47'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column('farm_visits', sa.Column('payload_hash', sa.String(length=64), nullable=True), schema='pima')
+    op.add_column('wetmill_visits', sa.Column('payload_hash', sa.String(length=64), nullable=True), schema='pima')
+
+
+def downgrade() -> None:
+    op.drop_column('wetmill_visits', 'payload_hash', schema='pima')
+    op.drop_column('farm_visits', 'payload_hash', schema='pima')
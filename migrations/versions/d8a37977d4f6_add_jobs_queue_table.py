@@ -0,0 +1,52 @@
+"""add jobs queue table
+
+Revision ID: d8a37977d4f6
+Revises: bdf5065d65fb
+Create Date: 2026-10-18 10:12:31.402117
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision = 'd8a37977d4f6'
+down_revision = 'bdf5065d65fb'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table('jobs',
+    sa.Column('queue', sa.String(), nullable=False),
+    sa.Column('job_id', sa.String(), nullable=True),
+    sa.Column('job_name', sa.String(), nullable=True),
+    sa.Column('payload', postgresql.JSONB(astext_type=sa.Text()), nullable=False),
+    sa.Column('status', sa.String(), server_default='new', nullable=False),
+    sa.Column('run_retries', sa.Integer(), server_default=sa.text('0'), nullable=False),
+    sa.Column('last_retried_at', sa.DateTime(timezone=True), nullable=True),
+    sa.Column('next_retry_at', sa.DateTime(timezone=True), nullable=True),
+    sa.Column('waiting_on', postgresql.ARRAY(sa.String()), server_default=sa.text("'{}'::varchar[]"), nullable=False),
+    sa.Column('error', sa.Text(), nullable=True),
+    sa.Column('record_id', sa.String(), nullable=True),
+    sa.Column('lease_owner', sa.String(), nullable=True),
+    sa.Column('lease_expires_at', sa.DateTime(timezone=True), nullable=True),
+    sa.Column('dead_lettered_at', sa.DateTime(timezone=True), nullable=True),
+    sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+    sa.Column('updated_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+    sa.Column('id', sa.UUID(), nullable=False),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('queue', 'job_id', name='uq_jobs_queue_job_id'),
+    schema='pima'
+    )
+    op.create_index('idx_jobs_status_next_retry_at', 'jobs', ['status', 'next_retry_at'], unique=False, schema='pima')
+    op.create_index('idx_jobs_queue_status_created_at', 'jobs', ['queue', 'status', 'created_at'], unique=False, schema='pima')
+    op.create_index('idx_jobs_waiting_on', 'jobs', ['waiting_on'], unique=False, schema='pima', postgresql_using='gin')
+
+
+def downgrade() -> None:
+    op.drop_index('idx_jobs_waiting_on', table_name='jobs', schema='pima', postgresql_using='gin')
+    op.drop_index('idx_jobs_queue_status_created_at', table_name='jobs', schema='pima')
+    op.drop_index('idx_jobs_status_next_retry_at', table_name='jobs', schema='pima')
+    op.drop_table('jobs', schema='pima')
@@ -0,0 +1,16 @@
+"""Test setup: the app modules build their clients at import, so give them
+settings that never reach a real database or Google Cloud."""
+
+import os
+
+import google.auth
+import google.auth.credentials
+
+# Only used to build the engine; unit tests never connect
+os.environ.setdefault("PG_LOCAL_DATABASE_URL", "postgresql+psycopg2://test@localhost/test")
+
+# The Cloud Logging client created by core.logging_util needs credentials
+google.auth.default = lambda *args, **kwargs: (
+    google.auth.credentials.AnonymousCredentials(),
+    "test-project",
+)
@@ -0,0 +1,49 @@
+from core import hash_util
+from core.hash_util import payload_hash
+
+PAYLOAD = {
+    "id": "form-1",
+    "received_on": "2026-01-01T00:00:00Z",
+    "form": {"farmer": "abc", "answers": [{"q": 1}, {"q": 2}]},
+}
+
+
+def test_ignores_key_order():
+    reordered = {
+        "form": {"answers": [{"q": 1}, {"q": 2}], "farmer": "abc"},
+        "received_on": PAYLOAD["received_on"],
+        "id": "form-1",
+    }
+    assert payload_hash(reordered) == payload_hash(PAYLOAD)
+
+
+def test_ignores_volatile_keys_at_any_depth():
+    reforwarded = {
+        **PAYLOAD,
+        "received_on": "2026-02-01T00:00:00Z",
+        "server_modified_on": "2026-02-01T00:00:00Z",
+        "form": {**PAYLOAD["form"], "edited_on": "2026-02-01T00:00:00Z"},
+    }
+    assert payload_hash(reforwarded) == payload_hash(PAYLOAD)
+
+
+def test_changes_with_the_answers():
+    edited = {**PAYLOAD, "form": {**PAYLOAD["form"], "farmer": "xyz"}}
+    assert payload_hash(edited) != payload_hash(PAYLOAD)
+
+
+def test_list_order_matters():
+    reordered = {**PAYLOAD, "form": {**PAYLOAD["form"], "answers": [{"q": 2}, {"q": 1}]}}
+    assert payload_hash(reordered) != payload_hash(PAYLOAD)
+
+
+def test_changes_with_the_hash_version(monkeypatch):
+    before = payload_hash(PAYLOAD)
+    monkeypatch.setattr(hash_util, "PAYLOAD_HASH_VERSION", "2")
+    assert payload_hash(PAYLOAD) != before
+
+
+def test_is_a_sha256_hex_digest():
+    digest = payload_hash(PAYLOAD)
+    assert len(digest) == 64
+    int(digest, 16)
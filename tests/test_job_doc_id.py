@@ -0,0 +1,31 @@
+import hashlib
+
+from core import job_doc_id
+
+
+def test_is_stable_for_the_same_source_and_form():
+    assert job_doc_id("commcare_payloads", "form-1") == job_doc_id(
+        "commcare_payloads", "form-1"
+    )
+
+
+def test_is_the_sha256_of_collection_and_form_id():
+    assert (
+        job_doc_id("commcare_payloads", "form-1")
+        == hashlib.sha256(b"commcare_payloads:form-1").hexdigest()
+    )
+
+
+def test_differs_across_forms_and_collections():
+    ids = {
+        job_doc_id("commcare_payloads", "form-1"),
+        job_doc_id("commcare_payloads", "form-2"),
+        job_doc_id("other_payloads", "form-1"),
+    }
+    assert len(ids) == 3
+
+
+def test_is_a_valid_firestore_doc_id():
+    doc_id = job_doc_id("commcare_payloads", "a/b")
+    assert "/" not in doc_id
+    assert len(doc_id) == 64
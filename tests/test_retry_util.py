@@ -0,0 +1,44 @@
+from datetime import datetime, timezone
+
+import pytest
+
+from core import retry_util
+from core.retry_util import next_retry_at, retry_delay_s
+
+NOW = datetime(2026, 1, 1, tzinfo=timezone.utc)
+
+
+@pytest.fixture
+def delays(monkeypatch):
+    monkeypatch.setattr(retry_util, "RETRY_BASE_DELAY_S", 100.0)
+    monkeypatch.setattr(retry_util, "RETRY_MAX_DELAY_S", 1000.0)
+
+
+@pytest.mark.parametrize("retries, full_delay", [(0, 100), (1, 200), (3, 800), (4, 1000), (20, 1000)])
+def test_delay_doubles_up_to_the_cap(delays, retries, full_delay):
+    for _ in range(50):
+        assert full_delay / 2 <= retry_delay_s(retries) <= full_delay
+
+
+def test_delay_bounds_without_jitter(delays, monkeypatch):
+    monkeypatch.setattr(retry_util.random, "uniform", lambda low, high: high)
+    assert retry_delay_s(2) == 400
+    monkeypatch.setattr(retry_util.random, "uniform", lambda low, high: low)
+    assert retry_delay_s(2) == 200
+
+
+def test_negative_retries_use_the_base_delay(delays, monkeypatch):
+    monkeypatch.setattr(retry_util.random, "uniform", lambda low, high: high)
+    assert retry_delay_s(-1) == 100
+
+
+def test_next_retry_at_is_relative_to_now(delays, monkeypatch):
+    monkeypatch.setattr(retry_util.random, "uniform", lambda low, high: high)
+    assert (next_retry_at(1, NOW) - NOW).total_seconds() == 200
+
+
+def test_next_retry_at_defaults_to_the_current_time(delays):
+    before = datetime.now(timezone.utc)
+    due = next_retry_at(0)
+    assert due.tzinfo is not None
+    assert 50 <= (due - before).total_seconds() <= 101
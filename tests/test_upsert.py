@@ -0,0 +1,203 @@
+import uuid
+from types import SimpleNamespace
+
+import pytest
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.sql.dml import Insert
+
+from models import Farmer, Observation
+from services import upsert
+from services.upsert import _upsert_statement, active_rows, upsert_rows
+
+CREATED_BY = uuid.uuid4()
+
+
+def compile_sql(stmt):
+    return str(stmt.compile(dialect=postgresql.dialect()))
+
+
+def farmer_row(case_id, **fields):
+    return {
+        "commcare_case_id": case_id,
+        "created_by_id": CREATED_BY,
+        "last_updated_by_id": CREATED_BY,
+        **fields,
+    }
+
+
+class FakeSession:
+    """Records the statements upsert_rows runs. Inserts return one record
+    per row, except for keys in `skipped` (as if ON CONFLICT left the row
+    alone); loads return the keys in `existing`."""
+
+    def __init__(self, conflict_column, skipped=(), existing=()):
+        self.conflict_column = conflict_column
+        self.skipped = set(skipped)
+        self.existing = set(existing)
+        self.info = {}
+        self.inserts = []  # Conflict keys of each INSERT
+        self.insert_params = []
+        self.loads = []  # SQL of each SELECT
+
+    def _record(self, key):
+        return SimpleNamespace(**{self.conflict_column: key, "id": f"id-{key}"})
+
+    def scalars(self, stmt, execution_options=None):
+        if isinstance(stmt, Insert):
+            params = stmt.compile(dialect=postgresql.dialect()).params
+            keys = [
+                value
+                for name, value in sorted(params.items())
+                if name == self.conflict_column
+                or name.startswith(f"{self.conflict_column}_m")
+            ]
+            self.inserts.append(keys)
+            self.insert_params.append(params)
+            return [self._record(key) for key in keys if key not in self.skipped]
+
+        compiled = stmt.compile(dialect=postgresql.dialect())
+        self.loads.append(str(compiled))
+        params = compiled.params
+        requested = [
+            key for value in params.values() if isinstance(value, list) for key in value
+        ]
+        return [self._record(key) for key in requested if key in self.existing]
+
+
+def test_partial_index_predicate_is_the_conflict_target():
+    stmt = _upsert_statement(
+        Observation,
+        [{"submission_id": "s1", "created_by_id": CREATED_BY}],
+        "submission_id",
+        {"submission_id"},
+        active_rows(Observation),
+    )
+    assert "ON CONFLICT (submission_id) WHERE is_deleted = false DO UPDATE" in compile_sql(stmt)
+
+
+def test_full_unique_constraint_has_no_conflict_predicate():
+    sql = compile_sql(
+        _upsert_statement(Farmer, [farmer_row("c1")], "commcare_case_id", (), None)
+    )
+    assert "ON CONFLICT (commcare_case_id) DO UPDATE" in sql
+
+
+def test_core_fields_overwrite_and_other_fields_coalesce():
+    sql = compile_sql(
+        _upsert_statement(
+            Farmer,
+            [farmer_row("c1", tns_id="t1", first_name="Ana")],
+            "commcare_case_id",
+            {"tns_id"},
+            None,
+        )
+    )
+    assert "tns_id = excluded.tns_id" in sql
+    assert "first_name = coalesce(excluded.first_name, public.farmers.first_name)" in sql
+    assert "commcare_case_id = excluded.commcare_case_id" in sql
+
+
+def test_created_by_is_only_set_on_insert():
+    sql = compile_sql(
+        _upsert_statement(Farmer, [farmer_row("c1")], "commcare_case_id", (), None)
+    )
+    update = sql.split("DO UPDATE SET", 1)[1].split(" RETURNING ", 1)[0]
+    assert " created_by_id" not in update
+    assert "last_updated_by_id = excluded.last_updated_by_id" in update
+
+
+def test_unchanged_rows_are_not_updated():
+    sql = compile_sql(
+        _upsert_statement(
+            Farmer, [farmer_row("c1", first_name="Ana")], "commcare_case_id", (), None
+        )
+    )
+    where = sql.split("DO UPDATE SET", 1)[1].split(" WHERE ", 1)[1].split(" RETURNING ", 1)[0]
+    assert "IS DISTINCT FROM" in where
+    # Audit fields alone never make a row change
+    assert "last_updated_by_id IS DISTINCT FROM" not in where
+
+
+def test_duplicate_keys_collapse_to_the_last_row():
+    db = FakeSession("commcare_case_id")
+    records = upsert_rows(
+        db,
+        Farmer,
+        [
+            farmer_row("c1", first_name="First"),
+            farmer_row("c2", first_name="Other"),
+            farmer_row("c1", first_name="Last"),
+        ],
+        "commcare_case_id",
+    )
+
+    assert db.inserts == [["c1", "c2"]]
+    assert [record.commcare_case_id for record in records] == ["c1", "c2", "c1"]
+    assert records[0] is records[2]
+
+
+def test_duplicate_keys_write_the_last_values():
+    db = FakeSession("commcare_case_id")
+    upsert_rows(
+        db,
+        Farmer,
+        [farmer_row("c1", first_name="First"), farmer_row("c1", first_name="Last")],
+        "commcare_case_id",
+    )
+    values = db.insert_params[0].values()
+    assert "Last" in values
+    assert "First" not in values
+
+
+def test_batches_are_chunked(monkeypatch):
+    monkeypatch.setattr(upsert, "UPSERT_CHUNK_SIZE", 2)
+    db = FakeSession("commcare_case_id")
+    upsert_rows(
+        db, Farmer, [farmer_row(f"c{i}") for i in range(5)], "commcare_case_id"
+    )
+    assert [len(keys) for keys in db.inserts] == [2, 2, 1]
+
+
+def test_soft_deleted_conflicts_are_left_alone():
+    sql = compile_sql(
+        _upsert_statement(Farmer, [farmer_row("c1")], "commcare_case_id", (), None)
+    )
+    where = sql.split("DO UPDATE SET", 1)[1].split(" WHERE ", 1)[1]
+    assert where.startswith("public.farmers.is_deleted = false AND")
+
+
+def test_rows_matching_soft_deleted_records_raise():
+    # c2 is neither written by the upsert nor found among the active rows
+    db = FakeSession("commcare_case_id", skipped={"c1", "c2"}, existing={"c1"})
+    with pytest.raises(ValueError, match="soft-deleted for commcare_case_id: c2"):
+        upsert_rows(db, Farmer, [farmer_row("c1"), farmer_row("c2")], "commcare_case_id")
+
+
+def test_unchanged_rows_are_loaded_instead():
+    db = FakeSession("commcare_case_id", skipped={"c1"}, existing={"c1"})
+    records = upsert_rows(db, Farmer, [farmer_row("c1")], "commcare_case_id")
+    assert [record.commcare_case_id for record in records] == ["c1"]
+    # Only active rows are loaded back
+    assert "farmers.is_deleted = false" in db.loads[0]
+
+
+class FarmerUpserts(upsert.BaseUpsertService):
+    model = Farmer
+    conflict_column = "commcare_case_id"
+
+
+def schema(**fields):
+    return SimpleNamespace(model_dump=lambda exclude_unset: fields)
+
+
+def test_bulk_upsert_returns_one_id_per_item():
+    service = FarmerUpserts(FakeSession("commcare_case_id"))
+    ids = service.bulk_upsert(
+        [
+            schema(commcare_case_id="c1"),
+            schema(commcare_case_id="c2"),
+            schema(commcare_case_id="c1"),
+        ],
+        CREATED_BY,
+    )
+    assert ids == ["id-c1", "id-c2", "id-c1"]